@@ -0,0 +1,98 @@
+"""
+StarbaseSim Launch Control - Clocks
+Time sources shared by the server and flight software, so long sequences
+(propellant load, countdown) can be rehearsed faster than real time
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+
+SETTLE_ITERATIONS = 20  # Event loop passes before each jump in event-skip mode
+
+class Clock:
+    """Real wall-clock time source (the default everywhere)"""
+
+    def time(self):
+        """Current wall-clock time in seconds since the epoch"""
+        return time.time()
+
+    def monotonic(self):
+        """Monotonic seconds, use this for measuring intervals"""
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        """Sleep for the given number of (clock) seconds"""
+        await asyncio.sleep(seconds)
+
+class SimulatedClock(Clock):
+    """
+    Simulated time source for rehearsals and tests
+    speed: run N times faster than real time (e.g. 600 = 10 minutes per second)
+    speed=None: event-skip mode, time jumps straight to the next pending sleep
+                as soon as the event loop goes quiet. Everything using the clock
+                must then run on the same event loop.
+    settle_time: real seconds the event-skip mode waits for socket traffic
+                 to settle before jumping ahead
+    """
+
+    def __init__(self, speed=60.0, start_time=None, settle_time=0.001):
+        self.speed = speed
+        self.settle_time = settle_time
+        self._start_time = time.time() if start_time is None else start_time
+        self._real_start = time.monotonic()
+
+        # Event-skip state
+        self._now = 0.0
+        self._sleepers = []
+        self._counter = itertools.count()
+        self._skipper = None
+
+    @property
+    def event_skip(self):
+        return not self.speed
+
+    def monotonic(self):
+        if self.event_skip:
+            return self._now
+        return (time.monotonic() - self._real_start) * self.speed
+
+    def time(self):
+        return self._start_time + self.monotonic()
+
+    async def sleep(self, seconds):
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+
+        if not self.event_skip:
+            await asyncio.sleep(seconds / self.speed)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self._now + seconds, next(self._counter), future))
+        if self._skipper is None or self._skipper.done():
+            self._skipper = asyncio.create_task(self._skip_ahead())
+        await future
+
+    async def _skip_ahead(self):
+        """Advance simulated time to each pending wake-up in turn"""
+        while self._sleepers:
+            # Let every runnable task (and any in-flight socket I/O) settle first. A
+            # message between two local sockets moves one hop per loop iteration
+            for _ in range(SETTLE_ITERATIONS):
+                await asyncio.sleep(0)
+            await asyncio.sleep(self.settle_time)
+
+            # Drop sleepers that were cancelled while waiting
+            while self._sleepers and self._sleepers[0][2].done():
+                heapq.heappop(self._sleepers)
+            if not self._sleepers:
+                break
+
+            self._now = max(self._now, self._sleepers[0][0])
+            while self._sleepers and self._sleepers[0][0] <= self._now:
+                _, _, future = heapq.heappop(self._sleepers)
+                if not future.done():
+                    future.set_result(None)
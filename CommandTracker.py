@@ -0,0 +1,203 @@
+"""
+StarbaseSim Launch Control - Command Tracking
+Follows commands from the proxy to their effect in telemetry: a command is
+confirmed when the target vehicle's telemetry shows it (engine bitmask,
+propellant mass, throttle where the game reports it), or times out. Command-to-effect latency is kept
+in a histogram per GameCommand.
+"""
+
+import bisect
+import math
+
+from Clock import Clock
+from GameCommand import GameCommand, command_name
+from EngineEvents import vehicle_key
+
+DEFAULT_TIMEOUT = 10.0  # seconds
+MAX_TIMEOUT = 300.0  # Longest wait a client may ask for
+PROPELLANT_TOLERANCE = 0.01  # Fraction of the commanded mass (at least 1 t)
+
+class LatencyHistogram:
+    """Fixed log-spaced buckets in milliseconds, cheap to update and to merge"""
+    BOUNDS_MS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)  # Last bucket is > 10 s
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.buckets[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return None
+        needed = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= needed:
+                return round(min(bound, self.max), 1)
+        return round(self.max, 1)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 1) if self.count else None,
+            "min_ms": round(self.min, 1) if self.min is not None else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 1) if self.max is not None else None,
+            "buckets_ms": dict(zip([*map(str, self.BOUNDS_MS), "inf"], self.buckets))
+        }
+
+def expected_effect(command_data):
+    """
+    Test on the target's telemetry that shows the command took effect, or None
+    if there is none to see. The test itself returns None when the frame does
+    not carry the field it needs.
+    """
+    command = command_data.get('command')
+    state = bool(command_data.get('state'))
+    value = command_data.get('value')
+    try:
+        if command == GameCommand.Engines:
+            return lambda t: bool(t.get('enginesThatAreRunningBitmask')) == state
+        if command == GameCommand.Raptor:
+            bit = 1 << (int(value) - 1)
+            return lambda t: bool((t.get('enginesThatAreRunningBitmask') or 0) & bit) == state
+        if command == GameCommand.Throttle:
+            value = float(value)
+            # The game's own telemetry has no throttle field, only the stand-in game sends it
+            return lambda t: abs(t['throttle'] - value) <= 0.5 if t.get('throttle') is not None else None
+        if command == GameCommand.Propellant:
+            value = float(value)
+            tolerance = max(1000.0, value * PROPELLANT_TOLERANCE)
+            return lambda t: abs(t.get('fuelMass', 0) + t.get('oxidizerMass', 0) - value) <= tolerance
+    except (TypeError, ValueError):
+        return None
+    return None
+
+class PendingCommand:
+    """A command on its way to the game, and who to tell when it lands"""
+
+    def __init__(self, command_data, check, client, command_id, sent_at, timeout):
+        self.command_data = command_data
+        self.command = command_data.get('command')
+        self.vehicle = vehicle_key(command_data.get('target') or '')
+        self.check = check
+        self.client = client
+        self.command_id = command_id
+        self.sent_at = sent_at
+        self.deadline = sent_at + timeout
+
+    def ack(self, status, now):
+        return {
+            "type": "command_ack",
+            "id": self.command_id,
+            "command": self.command,
+            "status": status,  # confirmed, timeout, failed or unverifiable
+            "latency": now - self.sent_at if status == "confirmed" else None
+        }
+
+class CommandTracker:
+    """Commands waiting for their effect to show up in telemetry"""
+
+    def __init__(self, clock=None):
+        self.clock = clock or Clock()
+        self.pending = []
+        self.latency = {}  # GameCommand value -> LatencyHistogram
+        self.timeouts = {}  # GameCommand value -> count
+
+    def sent(self, command_data, client=None, command_id=None, timeout=None):
+        """Start tracking a command that was just sent to the game"""
+        if not isinstance(command_data, dict):
+            return
+        check = expected_effect(command_data)
+        if check is None and command_id is None:
+            return  # Nothing to measure and nobody asking
+        try:
+            timeout = float(timeout) if timeout is not None else DEFAULT_TIMEOUT
+        except (TypeError, ValueError):
+            timeout = DEFAULT_TIMEOUT
+        if not math.isfinite(timeout) or timeout < 0:
+            timeout = DEFAULT_TIMEOUT  # inf or NaN (e.g. 1e400 in the JSON) would never expire
+        timeout = min(timeout, MAX_TIMEOUT)
+        self.pending.append(PendingCommand(command_data, check, client, command_id, self.clock.monotonic(), timeout))
+
+    def observe(self, telemetry):
+        """Confirm commands whose effect shows in this frame, returns [(client, ack)] for tracked commands"""
+        if not self.pending:
+            return []
+        vehicle = vehicle_key(telemetry.get('objectname') or '')
+        now = self.clock.monotonic()
+        acks = []
+        still_pending = []
+        for pending in self.pending:
+            if pending.check is None or pending.vehicle != vehicle:
+                still_pending.append(pending)
+                continue
+            effect = pending.check(telemetry)
+            if effect is None:
+                # This game doesn't report the field, so there is nothing to wait for
+                if pending.command_id is not None:
+                    acks.append((pending.client, pending.ack("unverifiable", now)))
+            elif effect:
+                self.latency.setdefault(pending.command, LatencyHistogram()).add(now - pending.sent_at)
+                if pending.command_id is not None:
+                    acks.append((pending.client, pending.ack("confirmed", now)))
+            else:
+                still_pending.append(pending)
+        self.pending = still_pending
+        return acks
+
+    def expire(self):
+        """
+        Time out commands whose effect never showed up and answer the ones that
+        have no visible effect. Returns [(client, ack)] for tracked commands.
+        """
+        if not self.pending:
+            return []
+        now = self.clock.monotonic()
+        acks = []
+        still_pending = []
+        for pending in self.pending:
+            if pending.check is None:
+                if pending.command_id is not None:
+                    acks.append((pending.client, pending.ack("unverifiable", now)))
+            elif now >= pending.deadline:
+                self.timeouts[pending.command] = self.timeouts.get(pending.command, 0) + 1
+                if pending.command_id is not None:
+                    acks.append((pending.client, pending.ack("timeout", now)))
+            else:
+                still_pending.append(pending)
+        self.pending = still_pending
+        return acks
+
+    def client_disconnected(self, client):
+        """Keep measuring the commands, but nobody is left to tell"""
+        for pending in self.pending:
+            if pending.client == client:
+                pending.client = None
+                pending.command_id = None
+
+    def get_metrics(self):
+        return {
+            "pending_commands": len(self.pending),
+            "command_latency": {
+                command_name(command): histogram.summary()
+                for command, histogram in self.latency.items()
+            },
+            "command_timeouts": {
+                command_name(command): count
+                for command, count in self.timeouts.items()
+            }
+        }
@@ -0,0 +1,308 @@
+"""
+StarbaseSim Launch Control - Countdown
+Server-side countdown state machine (T-time, holds, polls, abort) on a
+monotonic clock, shared by every console and the flight software
+"""
+
+import asyncio
+import math
+
+from Clock import Clock
+from GameCommand import GameCommand
+
+START_TIME = 75 * 60  # T-1:15:00
+LAUNCH_POLL_TIME = 300  # T-5:00
+HOLD_TIME = 40  # Optional hold at T-40
+PROPELLANT_POLL_SYSTEMS = ['SQD', 'BQD', 'Tank Farm', 'Booster', 'Ship']
+LAUNCH_POLL_SYSTEMS = ['Booster', 'Ship', 'GSE']
+COUNTING_STATES = ('COUNTING', 'LAUNCH_POLL')
+
+class Countdown:
+    """
+    The one authoritative launch countdown.
+    t_minus() is seconds before T-0 (negative after liftoff). State changes are
+    broadcast as 'countdown_state', once-a-second ticks as 'countdown_tick' and
+    operator messages as 'countdown_message'.
+    """
+
+    def __init__(self, clock=None, broadcast=None, send_to_game=None):
+        self.clock = clock or Clock()
+        self.broadcast = broadcast  # async callable(message)
+        self.send_to_game = send_to_game  # callable(command_data)
+        self.changed = asyncio.Event()
+        self.pending = []
+        self.reset_task = None
+        self.reset()
+
+    def reset(self):
+        """Back to T-1:15:00 with fresh polls"""
+        self.state = 'PRE_LAUNCH'
+        self.running = False
+        self.t_anchor = START_TIME
+        self.mono_anchor = self.clock.monotonic()
+        self.last_second = START_TIME
+        self.hold_at_t40 = False
+        self.launch_poll_active = False
+        self.propellant_poll = {system: None for system in PROPELLANT_POLL_SYSTEMS}
+        self.launch_poll = {system: None for system in LAUNCH_POLL_SYSTEMS}
+        self.booster_engines = None
+        self.ship_engines = None
+
+    # =========================================================================
+    # TIMEKEEPING
+    # =========================================================================
+
+    def t_minus(self):
+        """Seconds before T-0 right now (negative after liftoff)"""
+        if self.running:
+            return self.t_anchor - (self.clock.monotonic() - self.mono_anchor)
+        return self.t_anchor
+
+    def set_t(self, t_minus):
+        self.t_anchor = t_minus
+        self.mono_anchor = self.clock.monotonic()
+        self.last_second = math.ceil(t_minus)
+
+    def pause(self):
+        self.t_anchor = self.t_minus()
+        self.running = False
+
+    def resume(self):
+        self.mono_anchor = self.clock.monotonic()
+        self.running = True
+
+    def is_counting(self):
+        return self.state in COUNTING_STATES
+
+    # =========================================================================
+    # STATE AND MESSAGES
+    # =========================================================================
+
+    def get_state(self):
+        return {
+            "type": "countdown_state",
+            "state": self.state,
+            "t": self.t_minus(),
+            "running": self.running,
+            "server_time": self.clock.time(),
+            "hold_at_t40": self.hold_at_t40,
+            "launch_poll_active": self.launch_poll_active,
+            "propellant_poll": self.propellant_poll,
+            "launch_poll": self.launch_poll,
+            "booster_engines": self.booster_engines,
+            "ship_engines": self.ship_engines
+        }
+
+    def get_tick(self):
+        return {
+            "type": "countdown_tick",
+            "t": round(self.t_minus(), 3),
+            "running": self.running,
+            "server_time": self.clock.time()
+        }
+
+    def message(self, text, color, duration=3000):
+        self.pending.append({
+            "type": "countdown_message",
+            "text": text,
+            "color": color,
+            "duration": duration
+        })
+
+    async def publish(self, state_changed=True):
+        """Send queued messages (and the new state) to every client"""
+        messages, self.pending = self.pending, []
+        if state_changed:
+            messages.insert(0, self.get_state())
+            self.changed.set()
+        if self.broadcast:
+            for message in messages:
+                await self.broadcast(message)
+
+    # =========================================================================
+    # SEQUENCE
+    # =========================================================================
+
+    def hold(self):
+        self.state = 'HOLD'
+        self.pause()
+        self.message('HOLD at T-40 seconds', 'orange')
+
+    def abort(self):
+        self.state = 'ABORT'
+        self.pause()
+        self.message('LAUNCH ABORTED', 'red')
+
+    def launch(self):
+        self.state = 'LAUNCH'
+        self.launch_poll_active = False
+        self.message('LIFTOFF!', 'green')
+        # Sent once by the server, not once per console
+        if self.send_to_game:
+            self.send_to_game({'command': int(GameCommand.Engines), 'target': 'booster', 'state': True})
+
+    def start_launch_poll(self):
+        if not self.launch_poll_active and self.state != 'LAUNCH':
+            self.launch_poll_active = True
+            self.state = 'LAUNCH_POLL'
+
+    def on_second(self, second):
+        """Called once for every whole second the countdown passes. Returns False to stop."""
+        if second == LAUNCH_POLL_TIME:
+            self.start_launch_poll()
+        elif second == 45:
+            self.message('FINAL GO FOR LAUNCH', 'green')
+        elif second == HOLD_TIME and self.hold_at_t40:
+            self.set_t(HOLD_TIME)
+            self.hold()
+            return False
+        elif second == 30:
+            self.message("We're GO for launch", 'green', 7500)
+        elif second == 0:
+            self.launch()
+        return True
+
+    def check_propellant_poll(self):
+        decisions = self.propellant_poll.values()
+        if all(d is not None for d in decisions) and not all(d is True for d in decisions):
+            self.message('Propellant Load: NO GO - Maybe another time', 'red')
+            if self.reset_task is None or self.reset_task.done():
+                self.reset_task = asyncio.create_task(self.reset_propellant_poll(3))
+
+    async def reset_propellant_poll(self, delay):
+        await self.clock.sleep(delay)
+        self.propellant_poll = {system: None for system in PROPELLANT_POLL_SYSTEMS}
+        self.message('Propellant poll reset - Please make decisions again', 'blue')
+        await self.publish()
+
+    def launch_poll_decided(self):
+        decisions = [*self.launch_poll.values(), self.booster_engines, self.ship_engines]
+        return all(d is not None for d in decisions), all(d is True for d in decisions)
+
+    def check_launch_poll(self):
+        decided, all_go = self.launch_poll_decided()
+        if decided and not all_go and self.is_counting():
+            if self.t_minus() > HOLD_TIME:
+                self.hold_at_t40 = True
+                self.message('Launch: NO GO - Will hold at T-40', 'orange')
+            else:
+                self.abort()
+
+    def jump(self, seconds):
+        """Jump the clock to T-seconds"""
+        if seconds < 0:
+            self.message('Invalid time: cannot jump to negative time', 'red')
+            return
+        old = math.ceil(self.t_minus())
+        self.set_t(seconds)
+
+        # Like the old UI, a jump never opens the launch poll (that only happens on reaching T-5:00)
+        if seconds == 0:
+            self.launch()
+            self.message('Jumped to T-0 - Launching!', 'green')
+        elif seconds <= HOLD_TIME and self.hold_at_t40:
+            self.set_t(HOLD_TIME)
+            if self.state != 'HOLD':
+                self.hold()
+            self.message(f'Jumped to T-{seconds} - Holding at T-40', 'orange')
+        else:
+            self.message(f'Jumped from T-{old} to T-{seconds}', 'blue')
+
+    async def handle_command(self, data):
+        """Apply an operator command, e.g. {"type": "countdown_command", "action": "hold_at_t40"}"""
+        action = data.get('action')
+
+        if action == 'start' and self.state in ('PRE_LAUNCH', 'ABORT'):
+            self.reset()
+            self.state = 'PROPELLANT_POLL'
+
+        elif action == 'propellant_decision' and self.state == 'PROPELLANT_POLL':
+            if data.get('system') not in self.propellant_poll:
+                return
+            self.propellant_poll[data['system']] = bool(data.get('decision'))
+            self.check_propellant_poll()
+
+        elif action == 'propellant_go' and self.state == 'PROPELLANT_POLL':
+            if not all(d is True for d in self.propellant_poll.values()):
+                return
+            self.message('PROPELLANT LOAD - GO!', 'green')
+            self.state = 'COUNTING'
+            self.resume()
+
+        elif action == 'launch_decision':
+            if data.get('system') not in self.launch_poll:
+                return
+            self.launch_poll[data['system']] = bool(data.get('decision'))
+            self.check_launch_poll()
+
+        elif action == 'engines_decision':
+            if data.get('vehicle') == 'booster':
+                self.booster_engines = bool(data.get('decision'))
+            elif data.get('vehicle') == 'ship':
+                self.ship_engines = bool(data.get('decision'))
+            else:
+                return
+            self.check_launch_poll()
+
+        elif action == 'launch_go' and self.launch_poll_decided() == (True, True):
+            self.message('LAUNCH - GO!', 'green')
+            self.launch_poll_active = False
+
+        elif action == 'hold_at_t40':
+            if self.t_minus() > HOLD_TIME and self.is_counting():
+                self.hold_at_t40 = True
+                self.message('Will hold at T-40 seconds', 'orange')
+            elif self.is_counting():
+                self.set_t(HOLD_TIME)
+                self.hold()
+                self.message('Reverted to T-40 and holding', 'orange')
+
+        elif action == 'release_hold' and self.state == 'HOLD':
+            self.hold_at_t40 = False
+            self.state = 'COUNTING'
+            self.message('Resuming countdown', 'green')
+            self.resume()
+
+        elif action == 'abort' and self.state in (*COUNTING_STATES, 'HOLD', 'LAUNCH'):
+            self.abort()
+
+        elif action == 'jump' and (self.is_counting() or self.state == 'HOLD'):
+            try:
+                self.jump(int(data.get('seconds')))
+            except (TypeError, ValueError, OverflowError):  # OverflowError: inf, e.g. 1e400 in the JSON
+                self.message(f"Invalid time format: {data.get('seconds')}", 'red')
+
+        else:
+            return
+
+        await self.publish()
+
+    async def run(self):
+        """Advance the countdown second by second and broadcast ticks"""
+        while True:
+            if self.running:
+                t = self.t_minus()
+                current = math.ceil(t - 1e-9)
+                state_changed = False
+                for second in range(self.last_second - 1, current - 1, -1):
+                    state_before = (self.state, self.launch_poll_active, self.hold_at_t40)
+                    keep_going = self.on_second(second)
+                    self.last_second = second
+                    state_changed |= state_before != (self.state, self.launch_poll_active, self.hold_at_t40)
+                    if not keep_going:
+                        break
+                await self.publish(state_changed)
+                if self.broadcast and self.running:
+                    await self.broadcast(self.get_tick())
+
+            # Sleep to the next whole second, or until an operator changes something
+            t = self.t_minus()
+            self.changed.clear()
+            sleeper = asyncio.ensure_future(self.clock.sleep(t - (math.ceil(t - 1e-9) - 1))) if self.running else None
+            waker = asyncio.ensure_future(self.changed.wait())
+            try:
+                await asyncio.wait({sleeper, waker} - {None}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                if sleeper:
+                    sleeper.cancel()
+                waker.cancel()
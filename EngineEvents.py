@@ -0,0 +1,113 @@
+"""
+StarbaseSim Launch Control - Engine Events
+Decodes enginesThatAreRunningBitmask once per frame on the server and turns
+changes into compact engine events (lit, shutdown, engine-out, running count)
+"""
+
+from GameCommand import GameCommand
+
+ENGINE_COUNTS = {'B': 33, 'S': 6}  # Booster and ship, by objectname prefix
+TABLE_BYTES = 5  # Lookup tables cover 40 engines, enough for a booster
+
+# BYTE_ENGINES[k][b]: 1-based engine numbers for the set bits of byte value b at byte k
+BYTE_ENGINES = tuple(
+    tuple(tuple(k * 8 + bit + 1 for bit in range(8) if value >> bit & 1) for value in range(256))
+    for k in range(TABLE_BYTES)
+)
+
+def engine_numbers(mask):
+    """1-based numbers of the engines whose bits are set in mask"""
+    engines = []
+    k = 0
+    while mask:
+        value = mask & 0xFF
+        if value:
+            if k < TABLE_BYTES:
+                engines.extend(BYTE_ENGINES[k][value])
+            else:
+                engines.extend(k * 8 + bit + 1 for bit in range(8) if value >> bit & 1)
+        mask >>= 8
+        k += 1
+    return engines
+
+def engine_count(objectname, mask=0):
+    return ENGINE_COUNTS.get(objectname[:1], mask.bit_length())
+
+def vehicle_key(target):
+    """'booster' or 'ship' for a command target or objectname (e.g. 'B13' -> 'booster')"""
+    if target in ('booster', 'ship'):
+        return target
+    if target.startswith('B'):
+        return 'booster'
+    if target.startswith('S'):
+        return 'ship'
+    return target
+
+class EngineTracker:
+    """Last bitmask per vehicle, and which engines were commanded to run"""
+
+    def __init__(self):
+        self.masks = {}  # objectname -> last enginesThatAreRunningBitmask
+        self.commanded = {}  # 'booster'/'ship' -> mask of engines we told to run
+
+    def command_sent(self, command_data):
+        """Follow Engines/Raptor commands so unexpected shutdowns read as engine-out"""
+        if not isinstance(command_data, dict) or not isinstance(command_data.get('target'), str):
+            return
+        key = vehicle_key(command_data['target'])
+        command = command_data.get('command')
+        if command == GameCommand.Engines:
+            all_engines = (1 << engine_count(command_data['target'][:1].upper(), 1 << 63)) - 1
+            self.commanded[key] = all_engines if command_data.get('state') else 0
+        elif command == GameCommand.Raptor:
+            try:
+                bit = 1 << (int(command_data.get('value')) - 1)
+            except (TypeError, ValueError):
+                return
+            if command_data.get('state'):
+                self.commanded[key] = self.commanded.get(key, 0) | bit
+            else:
+                self.commanded[key] = self.commanded.get(key, 0) & ~bit
+
+    def event(self, objectname, mask, changed, engine_out=0):
+        """Engine numbers that lit or shut down (engine-outs are also in shutdown)"""
+        count = engine_count(objectname, mask)
+        return {
+            "type": "engines",
+            "objectname": objectname,
+            "lit": engine_numbers(changed & mask),
+            "shutdown": engine_numbers(changed & ~mask & ((1 << count) - 1)),
+            "engine_out": engine_numbers(engine_out),
+            "running": mask.bit_count(),
+            "engines": count
+        }
+
+    def observe(self, telemetry):
+        """Returns an engine event if this frame changed the engines, otherwise None"""
+        objectname = telemetry.get('objectname')
+        mask = telemetry.get('enginesThatAreRunningBitmask')
+        if not objectname or not isinstance(mask, int):
+            return None
+
+        previous = self.masks.get(objectname)
+        if previous == mask:
+            return None
+        self.masks[objectname] = mask
+        if previous is None:
+            # First frame from this vehicle: report the full state
+            return self.event(objectname, mask, (1 << engine_count(objectname, mask)) - 1 | mask)
+
+        changed = previous ^ mask
+        engine_out = changed & previous & self.commanded.get(vehicle_key(objectname), 0)
+        return self.event(objectname, mask, changed, engine_out)
+
+    def forget(self, objectname):
+        """Vehicle stopped reporting, leave it out of snapshots"""
+        self.masks.pop(objectname, None)
+
+    def get_state(self):
+        """Full engine state of every vehicle, for snapshots"""
+        return [
+            self.event(objectname, mask, (1 << engine_count(objectname, mask)) - 1 | mask)
+            for objectname, mask in self.masks.items()
+        ]
@@ -0,0 +1,181 @@
+"""
+StarbaseSim Launch Control - Event Log
+Non-blocking structured logging for the server and flight software. Records
+are queued by the caller and written to the console and the event journal on
+a background thread, so a slow or redirected console never stalls the event
+loop. The journal (JSON lines) holds every command sent and every script step
+for lining up with telemetry afterward.
+"""
+
+import json
+import time
+import atexit
+import queue
+import logging
+import threading
+import logging.handlers
+
+from Clock import Clock
+
+LOGGER_NAME = 'launchcontrol'
+DEFAULT_JOURNAL = 'launch_journal.jsonl'
+RECORD_FIELDS = ('t', 'component', 'vehicle', 'command', 'event')
+
+_lock = threading.Lock()
+_queue = queue.SimpleQueue()
+_listener = None
+_journal_path = None
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets the first `burst` copies of a message through per `interval` seconds,
+    then counts the rest and reports how many were dropped once the window ends
+    (e.g. "Failed to connect to game" every second while the game is closed).
+    """
+
+    def __init__(self, burst=3, interval=30.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.windows = {}  # (logger, level, message template) -> [window start, seen]
+
+    def filter(self, record):
+        if not getattr(record, 'console', True):
+            return False
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.levelno, getattr(record, 'template', record.msg))
+        now = time.monotonic()
+        window = self.windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            suppressed = window[1] - self.burst if window and window[1] > self.burst else 0
+            self.windows[key] = [now, 1]
+            if suppressed:
+                record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+            return True
+        window[1] += 1
+        return window[1] <= self.burst
+
+class ConsoleFormatter(logging.Formatter):
+    """HH:MM:SS component [vehicle] message"""
+
+    def format(self, record):
+        vehicle = f" [{record.vehicle}]" if getattr(record, 'vehicle', None) else ""
+        level = "" if record.levelno == logging.INFO else f"{record.levelname}: "
+        stamp = time.strftime('%H:%M:%S', time.localtime(record.created))
+        return f"{stamp} {getattr(record, 'component', record.name)}{vehicle} {level}{record.getMessage()}"
+
+class JournalFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "t": getattr(record, 't', record.created),
+            "wall_time": record.created,
+            "level": record.levelname,
+            "message": record.getMessage()
+        }
+        for field in RECORD_FIELDS[1:]:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        entry.update(getattr(record, 'fields', None) or {})
+        return json.dumps(entry, default=str)
+
+class JournalFilter(logging.Filter):
+    """Only journal entries (commands, script steps) and errors go to the journal file"""
+
+    def filter(self, record):
+        return getattr(record, 'journal', False) or record.levelno >= logging.ERROR
+
+def start(journal_path=DEFAULT_JOURNAL, burst=3, interval=30.0):
+    """Start (or restart with a new journal) the background writer. journal_path=None disables the journal."""
+    global _listener, _journal_path
+    with _lock:
+        if _listener is not None:
+            if journal_path == _journal_path:
+                return
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+
+        console = logging.StreamHandler()
+        console.setFormatter(ConsoleFormatter())
+        console.addFilter(RateLimitFilter(burst, interval))
+        handlers = [console]
+        if journal_path:
+            journal = logging.FileHandler(journal_path, mode='a', encoding='utf-8', delay=True)
+            journal.setFormatter(JournalFormatter())
+            journal.addFilter(JournalFilter())
+            handlers.append(journal)
+
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            logger.addHandler(logging.handlers.QueueHandler(_queue))
+
+        _listener = logging.handlers.QueueListener(_queue, *handlers)
+        _listener.start()
+        _journal_path = journal_path
+
+def stop():
+    """Flush everything queued and stop the background writer"""
+    global _listener, _journal_path
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+            _journal_path = None
+
+atexit.register(stop)  # Write out whatever is still queued on exit
+
+class EventLog:
+    """
+    Logger for one component ('server', 'flight', ...). Calls only queue the
+    record; formatting and writing happen on the background thread.
+    """
+
+    def __init__(self, component, clock=None):
+        self.component = component
+        self.clock = clock or Clock()
+        self.logger = logging.getLogger(f"{LOGGER_NAME}.{component}")
+        if _listener is None:
+            start(None)  # Console only until an entry point picks the journal (rehearsals must not write to it)
+
+    def log(self, level, message, *args, vehicle=None, command=None, journal=False, console=True, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(level, message, *args, extra={
+            't': self.clock.time(),  # Same time base as telemetry history
+            'template': message,
+            'component': self.component,
+            'vehicle': vehicle,
+            'command': command,
+            'journal': journal,
+            'console': console,
+            'fields': fields
+        })
+
+    def info(self, message, *args, **kwargs):
+        self.log(logging.INFO, message, *args, **kwargs)
+
+    def warning(self, message, *args, **kwargs):
+        self.log(logging.WARNING, message, *args, **kwargs)
+
+    def error(self, message, *args, **kwargs):
+        self.log(logging.ERROR, message, *args, **kwargs)
+
+    def command(self, command_data, **fields):
+        """Journal a command on its way to the game (journal only, commands are too frequent for the console)"""
+        command = command_data.get('command') if isinstance(command_data, dict) else None
+        target = command_data.get('target') if isinstance(command_data, dict) else None
+        message, args = ("Command %s -> %s", (command, target)) if target else ("Command %s", (command,))
+        self.log(logging.INFO, message, *args, vehicle=target, command=command,
+                 journal=True, console=False, event='command', data=command_data, **fields)
+
+    def step(self, message, *args, vehicle=None, **fields):
+        """Log and journal a flight script step"""
+        self.log(logging.INFO, message, *args, vehicle=vehicle, journal=True, event='step', **fields)
@@ -0,0 +1,273 @@
+"""
+StarbaseSim Launch Control - Scale-out Server
+One ingest process talks to the game and writes each encoded frame once into
+a shared-memory ring. K worker processes share the websocket port
+(SO_REUSEPORT) and fan the frames out to their own clients. Client messages
+go back to the ingest process over a queue.
+"""
+
+import asyncio
+import json
+import queue
+import signal
+import socket
+import struct
+import multiprocessing
+from multiprocessing import shared_memory
+
+import websockets
+
+import Server
+import EventLog
+from WebAssets import WebAssets
+
+# Ring layout: header (write seq, flags), then SLOTS slots of SLOT_SIZE bytes.
+# Each slot starts with (seq, length) and is followed by the encoded frame.
+HEADER = struct.Struct("<QQ")
+SLOT_HEADER = struct.Struct("<QI")
+SLOTS = 2048
+SLOT_SIZE = 8192
+FLAG_GAME_CONNECTED = 1
+
+log = EventLog.EventLog('fanout')
+
+class TelemetryRing:
+    """Single-writer, many-reader ring of encoded frames with sequence numbers"""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        self.seq = HEADER.unpack_from(self.buf, 0)[0]
+        self.dropped = 0
+
+    @classmethod
+    def create(cls):
+        shm = shared_memory.SharedMemory(create=True, size=HEADER.size + SLOTS * SLOT_SIZE)
+        HEADER.pack_into(shm.buf, 0, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: workers share the ingest process's resource tracker,
+            # so the extra registration is harmless and the owner still unlinks
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, payload):
+        """Append one encoded frame (ingest process only)"""
+        if len(payload) > SLOT_SIZE - SLOT_HEADER.size:
+            log.warning("Frame too large for fan-out ring (%d bytes), dropped", len(payload))
+            return
+        seq = self.seq + 1
+        offset = HEADER.size + (seq % SLOTS) * SLOT_SIZE
+
+        # Seqlock: invalidate the slot, write the frame, then publish the new seq
+        SLOT_HEADER.pack_into(self.buf, offset, 0, 0)
+        start = offset + SLOT_HEADER.size
+        self.buf[start:start + len(payload)] = payload
+        SLOT_HEADER.pack_into(self.buf, offset, seq, len(payload))
+        self.seq = seq
+        HEADER.pack_into(self.buf, 0, seq, self.flags())
+
+    def flags(self):
+        return HEADER.unpack_from(self.buf, 0)[1]
+
+    def set_game_connected(self, connected):
+        flags = FLAG_GAME_CONNECTED if connected else 0
+        HEADER.pack_into(self.buf, 0, self.seq, flags)
+
+    def game_connected(self):
+        return bool(self.flags() & FLAG_GAME_CONNECTED)
+
+    def latest_seq(self):
+        return HEADER.unpack_from(self.buf, 0)[0]
+
+    def read_from(self, next_seq):
+        """Read every frame from next_seq on, returns (frames as str, next seq to read)"""
+        latest = self.latest_seq()
+        frames = []
+        if latest - next_seq + 1 > SLOTS - 1:
+            # Reader fell a whole ring behind, skip to what's still intact
+            self.dropped += latest - SLOTS + 2 - next_seq
+            next_seq = latest - SLOTS + 2
+
+        while next_seq <= latest:
+            offset = HEADER.size + (next_seq % SLOTS) * SLOT_SIZE
+            seq, length = SLOT_HEADER.unpack_from(self.buf, offset)
+            if seq == next_seq:
+                start = offset + SLOT_HEADER.size
+                # Decode straight out of shared memory, once per worker for all its clients
+                frame = str(self.buf[start:start + length], 'utf-8')
+                if SLOT_HEADER.unpack_from(self.buf, offset)[0] == seq:
+                    frames.append(frame)
+                else:
+                    self.dropped += 1
+            else:
+                self.dropped += 1
+            next_seq += 1
+        return frames, next_seq
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+# =========================================================================
+# WORKER PROCESSES
+# =========================================================================
+
+class FanOutWorker:
+    """Serves a share of the websocket clients from the ring"""
+
+    def __init__(self, index, ring_name, command_queue, reply_queue, poll_interval=0.005):
+        self.index = index
+        self.ring = TelemetryRing.attach(ring_name)
+        self.command_queue = command_queue
+        self.reply_queue = reply_queue
+        self.poll_interval = poll_interval
+        self.clients = {}  # id(websocket) -> websocket
+
+    async def handle_websocket(self, websocket):
+        client_id = id(websocket)
+        self.clients[client_id] = websocket
+        try:
+            await websocket.send(json.dumps({
+                "type": "status",
+                "connected": self.ring.game_connected()
+            }))
+            # The ingest process holds the last values, ask it on the client's behalf
+            self.command_queue.put(("message", self.index, client_id, {"type": "get_snapshot"}))
+
+            async for message in websocket:
+                try:
+                    self.command_queue.put(("message", self.index, client_id, json.loads(message)))
+                except json.JSONDecodeError:
+                    log.warning("Invalid JSON from client: %s", message[:200])
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.clients.pop(client_id, None)
+            self.command_queue.put(("closed", self.index, client_id, None))
+
+    async def pump_ring(self):
+        """Forward new frames from the ring to every client of this worker"""
+        next_seq = self.ring.latest_seq() + 1
+        while True:
+            frames, next_seq = self.ring.read_from(next_seq)
+            if frames and self.clients:
+                clients = list(self.clients.values())
+                for frame in frames:
+                    websockets.broadcast(clients, frame)
+            await asyncio.sleep(self.poll_interval)
+
+    async def pump_replies(self):
+        """Deliver replies from the ingest process to the client that asked"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                client_id, reply = await loop.run_in_executor(None, self.reply_queue.get, True, 0.1)
+            except queue.Empty:
+                continue
+            websocket = self.clients.get(client_id)
+            if websocket is not None:
+                try:
+                    await websocket.send(reply)
+                except websockets.exceptions.ConnectionClosed:
+                    pass
+
+    async def serve(self, host, port):
+        asyncio.create_task(self.pump_ring())
+        asyncio.create_task(self.pump_replies())
+        web_assets = WebAssets()
+        async with websockets.serve(self.handle_websocket, host, port, reuse_port=True,
+                                    process_request=web_assets.process_request):
+            log.info("Fan-out worker %d serving ws://%s:%s", self.index, host, port)
+            await asyncio.Future()  # Run forever
+
+def run_worker(index, ring_name, command_queue, reply_queue, host, port):
+    """Worker process entry point"""
+    worker = FanOutWorker(index, ring_name, command_queue, reply_queue)
+    try:
+        asyncio.run(worker.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.ring.close()
+
+# =========================================================================
+# INGEST PROCESS
+# =========================================================================
+
+async def pump_commands(controller, ring, command_queue, reply_queues):
+    """Handle client messages forwarded by the workers"""
+    loop = asyncio.get_running_loop()
+    while True:
+        ring.set_game_connected(controller.connected)
+        try:
+            kind, index, client_id, data = await loop.run_in_executor(None, command_queue.get, True, 0.1)
+        except queue.Empty:
+            continue
+
+        client = (index, client_id)
+        if kind == "closed":
+            controller.client_disconnected(client)
+            continue
+
+        try:
+            reply = await controller.handle_request(data, client)
+        except Exception as e:
+            # One bad console message must not take the ingest task (and every worker) down
+            controller.log.error("Error handling client message: %s", e, data=data)
+            continue
+        if reply is not None:
+            reply_queues[index].put((client_id, json.dumps(reply)))
+
+async def main(workers=2, host="localhost", port=8765):
+    """Run the game ingest here and fan out over `workers` processes"""
+    if not hasattr(socket, "SO_REUSEPORT"):
+        log.warning("SO_REUSEPORT not available on this platform, running a single server process")
+        await Server.main(host, port)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    ring = TelemetryRing.create()
+    command_queue = context.Queue()
+    reply_queues = [context.Queue() for _ in range(workers)]
+    processes = [
+        context.Process(target=run_worker, args=(index, ring.name, command_queue, reply_queues[index], host, port),
+                        daemon=True)
+        for index in range(workers)
+    ]
+
+    controller = Server.controller
+    controller.ring = ring
+    controller.reply_queues = reply_queues
+
+    # Clean up the workers and shared memory on SIGTERM as well as Ctrl+C
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        for process in processes:
+            process.start()
+        asyncio.create_task(controller.receive_from_game())
+        asyncio.create_task(controller.countdown.run())
+        log.info("Fan-out: ingest process + %d websocket workers on ws://%s:%s", workers, host, port)
+        await pump_commands(controller, ring, command_queue, reply_queues)
+    except asyncio.CancelledError:
+        log.info("Fan-out server shutting down")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=2)
+        controller.ring = None
+        controller.reply_queues = None
+        ring.close()
@@ -1,54 +1,25 @@
 import asyncio
 import websockets
 import json
-import time
 import math
-from enum import IntEnum, auto
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-class GameCommand(IntEnum):
-    NONE = 0
-    SendDataTick = auto()
-    SetWhoSendsData = auto()
-    SetRocketSetting = auto()
-    SpawnAtLocation = auto()
-    Engines = auto()
-    Raptor = auto()
-    Throttle = auto()
-    RCS = auto()
-    Flaps = auto()
-    FoldFlaps = auto()
-    GridFins = auto()
-    Gimbals = auto()
-    SetRCSManual = auto()
-    SetDragManual = auto()
-    SetGimbalManual = auto()
-    Propellant = auto()
-    CryotankPressure = auto()
-    HotStage = auto()
-    DetachHSR = auto()
-    FTS = auto()
-    OuterGimbalEngines = auto()
-    BoosterClamps = auto()
-    ControllerAltitude = auto()
-    ControllerEastNorth = auto()
-    ControllerAttitude = auto()
-    AttitudeTarget = auto()
-    ChillValve = auto()
-    DumpFuel = auto()
-    PopEngine = auto()
-    BigFlame = auto()
-    Chopsticks = auto()
-    PadADeluge = auto()
-    PadASQDQuickRetract = auto()
-    PadAOLMQuickRetract = auto()
-    PadABQDQuickRetract = auto()
-    MasseyDeluge = auto()
-    PadAOLMClampsExtend = auto()
-    PadAOLMRQDExtend = auto()
-    PadASpawnStack = auto()
+import Trajectory
+from Clock import Clock, SimulatedClock
+from GameCommand import GameCommand, command_name
+import EventLog
+from CommandTracker import LatencyHistogram
+
+ACK_HISTORY = 100  # Answered commands kept for late wait_for_command calls
 
 class FlightSoftware:
-    def __init__(self):
+    def __init__(self, clock=None, server_url='ws://localhost:8765'):
+        self.clock = clock or Clock()
+        self.log = EventLog.EventLog('flight', self.clock)
+        self.server_url = server_url
         self.ws = None
         self.connected = False
         self.telemetry = {
@@ -73,29 +44,89 @@ class FlightSoftware:
         self.ship_initial_wait = 17 * 60  # 17 minutes
         self.booster_initial_wait = 33 * 60 + 15  # 33 minutes 15 seconds
         
+        # Trajectory prediction (runs in a worker process)
+        self.predictions = {
+            'booster': None,
+            'ship': None
+        }
+        self.predictor_executor = None
+        self.predictor_task = None
+        self.ballistic_coefficients = {
+            'booster': Trajectory.BOOSTER_BALLISTIC_COEFFICIENT,
+            'ship': Trajectory.SHIP_BALLISTIC_COEFFICIENT
+        }
+        
+        # Countdown (the server owns the clock, we extrapolate between ticks)
+        self.countdown = None
+        self.countdown_received_at = None
+        
+        # Engine state from the server's engine events
+        self.running_engines = {
+            'booster': set(),
+            'ship': set()
+        }
+        self.engine_waiters = []  # (vehicle, kind, future)
+        
+        # Command confirmation (the server acks each command once telemetry shows it)
+        self.next_command_id = 0
+        self.pending_commands = {}  # id -> (GameCommand, sent at, future)
+        self.command_acks = {}  # id -> ack, the last ACK_HISTORY answered
+        self.command_latency = {}  # GameCommand name -> LatencyHistogram, send to confirmation
+        
+        # Set on every message from the server, wakes wait_for_condition
+        self.updated = asyncio.Event()
+        
     async def connect(self):
         """Connect to the server WebSocket"""
         try:
-            self.ws = await websockets.connect('ws://localhost:8765')
+            self.ws = await websockets.connect(self.server_url)
             self.connected = True
-            print("Connected to server")
+            self.log.info("Connected to server")
             return True
         except Exception as e:
-            print(f"Failed to connect: {e}")
+            self.log.error("Failed to connect: %s", e)
             self.connected = False
             return False
     
-    async def send_command(self, command_data):
-        """Send command to game through server"""
+    async def send_command(self, command_data, timeout=None):
+        """
+        Send command to game through server
+        Returns the command id (use with wait_for_command) or False if it couldn't be sent.
+        timeout: seconds the server waits for the effect in telemetry (default 10)
+        """
+        if self.connected and self.ws:
+            self.next_command_id += 1
+            command_id = self.next_command_id
+            message = {
+                'type': 'game_command',
+                'id': command_id,
+                'command': command_data
+            }
+            if timeout is not None:
+                message['timeout'] = timeout
+            future = asyncio.get_running_loop().create_future()
+            self.pending_commands[command_id] = (command_data.get('command'), self.clock.monotonic(), future)
+            try:
+                await self.ws.send(json.dumps(message))
+                self.log.command(command_data, id=command_id)
+                return command_id
+            except Exception as e:
+                self.pending_commands.pop(command_id, None)
+                self.log.error("Error sending command: %s", e, command=command_data.get('command'))
+                self.connected = False
+        return False
+    
+    async def request_data_rate(self, rate_hz):
+        """Ask the server for telemetry at (at least) rate_hz, 0 to drop the request"""
         if self.connected and self.ws:
             try:
                 await self.ws.send(json.dumps({
-                    'type': 'game_command',
-                    'command': command_data
+                    'type': 'subscribe',
+                    'rate': rate_hz
                 }))
                 return True
             except Exception as e:
-                print(f"Error sending command: {e}")
+                self.log.error("Error requesting data rate: %s", e)
                 self.connected = False
         return False
     
@@ -105,20 +136,94 @@ class FlightSoftware:
             async for message in self.ws:
                 data = json.loads(message)  # Fixed: changed parse to loads
                 if data.get('type') == 'telemetry':
-                    telem = data.get('data', {})
-                    objectname = telem.get('objectname', '')
-                    
-                    if objectname.startswith('B'):
-                        self.telemetry['booster'] = telem
-                    elif objectname.startswith('S'):
-                        self.telemetry['ship'] = telem
+                    self.store_telemetry(data.get('data', {}))
+                elif data.get('type') == 'snapshot':
+                    # Last known values, sent on connect
+                    for telem in data.get('data', []):
+                        self.store_telemetry(telem)
+                    if data.get('countdown'):
+                        self.store_countdown(data['countdown'])
+                    for event in data.get('engines', []):
+                        self.store_engine_event(event)
+                elif data.get('type') == 'engines':
+                    self.store_engine_event(data)
+                elif data.get('type') == 'command_ack':
+                    self.store_command_ack(data)
+                elif data.get('type') in ('countdown_state', 'countdown_tick'):
+                    self.store_countdown(data)
+                self.updated.set()
                         
         except websockets.exceptions.ConnectionClosed:
-            print("Connection closed")
+            self.log.warning("Connection closed")
             self.connected = False
         except Exception as e:
-            print(f"Error receiving telemetry: {e}")
+            self.log.error("Error receiving telemetry: %s", e)
             self.connected = False
+        finally:
+            # No acks will come for these any more
+            for _, _, future in self.pending_commands.values():
+                future.cancel()
+            self.pending_commands.clear()
+    
+    def store_telemetry(self, telem):
+        """Keep the latest frame for the booster or ship"""
+        objectname = telem.get('objectname', '')
+        
+        if objectname.startswith('B'):
+            self.telemetry['booster'] = telem
+        elif objectname.startswith('S'):
+            self.telemetry['ship'] = telem
+    
+    def store_countdown(self, update):
+        """Keep the latest countdown state (ticks only carry t and running)"""
+        self.countdown = {**(self.countdown or {}), **update}
+        self.countdown_received_at = self.clock.monotonic()
+    
+    def store_engine_event(self, event):
+        """Apply an engine event and wake any script waiting for it"""
+        objectname = event.get('objectname', '')
+        vehicle = 'booster' if objectname.startswith('B') else 'ship' if objectname.startswith('S') else None
+        if vehicle is None:
+            return
+        
+        running = self.running_engines[vehicle]
+        running.difference_update(event.get('shutdown', []))
+        running.update(event.get('lit', []))
+        
+        for waiter in list(self.engine_waiters):
+            waiter_vehicle, kind, future = waiter
+            if future.done() or (waiter_vehicle and waiter_vehicle != vehicle) or (kind and not event.get(kind)):
+                continue
+            future.set_result(event)
+            self.engine_waiters.remove(waiter)
+    
+    def store_command_ack(self, ack):
+        """Resolve a command's confirmation and record its round trip"""
+        pending = self.pending_commands.pop(ack.get('id'), None)
+        if pending is None:
+            return
+        command, sent_at, future = pending
+        self.command_acks[ack['id']] = ack
+        if len(self.command_acks) > ACK_HISTORY:
+            del self.command_acks[next(iter(self.command_acks))]
+        if ack.get('status') == 'confirmed':
+            self.command_latency.setdefault(command_name(command), LatencyHistogram()).add(self.clock.monotonic() - sent_at)
+        elif ack.get('status') in ('timeout', 'failed'):
+            self.log.warning("Command %s %s", command, ack.get('status'), command=command, journal=True,
+                             event='command_ack', id=ack.get('id'))
+        if not future.done():
+            future.set_result(ack)
+    
+    async def request_snapshot(self):
+        """Ask the server to resend the last known values"""
+        if self.connected and self.ws:
+            try:
+                await self.ws.send(json.dumps({'type': 'get_snapshot'}))
+                return True
+            except Exception as e:
+                self.log.error("Error requesting snapshot: %s", e)
+                self.connected = False
+        return False
     
     # =========================================================================
     # HELPER METHODS - Use these in your flight scripts!
@@ -192,23 +297,44 @@ class FlightSoftware:
         total_kg = fuel_kg + oxidizer_kg
         return total_kg / 1000  # Convert to tons
     
+    def get_prediction(self, vehicle='booster'):
+        """Get the latest ballistic prediction (None until the predictor has run)"""
+        return self.predictions.get(vehicle)
+    
+    def get_predicted_apogee(self, vehicle='booster'):
+        """Get predicted apogee altitude in meters"""
+        prediction = self.predictions.get(vehicle)
+        return prediction['apogee'] if prediction else None
+    
+    def get_predicted_impact_point(self, vehicle='booster'):
+        """Get predicted impact point [x, y] in meters (None if unknown)"""
+        prediction = self.predictions.get(vehicle)
+        return prediction['impact_point'] if prediction else None
+    
+    def get_time_to_ground(self, vehicle='booster'):
+        """Get predicted seconds until the vehicle reaches the ground (None if unknown)"""
+        prediction = self.predictions.get(vehicle)
+        return prediction['time_to_ground'] if prediction else None
+    
     async def start_engines(self, vehicle, engine_list=None):
         """
         Start engines on a vehicle
         vehicle: 'booster' or 'ship' (or full object name like 'B13')
         engine_list: list of engine numbers [1, 2, 3, ...] or None for all
+        Returns the command id (of the last command for an engine list)
         """
         if engine_list:
             for engine_num in engine_list:
-                await self.send_command({
+                command_id = await self.send_command({
                     'command': int(GameCommand.Raptor),
                     'target': vehicle,
                     'value': engine_num,
                     'state': True
                 })
-                await asyncio.sleep(0.05)  # Small delay between engines
+                await self.clock.sleep(0.05)  # Small delay between engines
+            return command_id
         else:
-            await self.send_command({
+            return await self.send_command({
                 'command': int(GameCommand.Engines),
                 'target': vehicle,
                 'state': True
@@ -218,15 +344,16 @@ class FlightSoftware:
         """Stop engines on a vehicle"""
         if engine_list:
             for engine_num in engine_list:
-                await self.send_command({
+                command_id = await self.send_command({
                     'command': int(GameCommand.Raptor),
                     'target': vehicle,
                     'value': engine_num,
                     'state': False
                 })
-                await asyncio.sleep(0.05)
+                await self.clock.sleep(0.05)
+            return command_id
         else:
-            await self.send_command({
+            return await self.send_command({
                 'command': int(GameCommand.Engines),
                 'target': vehicle,
                 'state': False
@@ -234,7 +361,7 @@ class FlightSoftware:
     
     async def set_throttle(self, vehicle, percent):
         """Set throttle percentage (0-100)"""
-        await self.send_command({
+        return await self.send_command({
             'command': int(GameCommand.Throttle),
             'target': vehicle,
             'value': percent
@@ -242,7 +369,7 @@ class FlightSoftware:
     
     async def set_attitude(self, vehicle, pitch, yaw, roll):
         """Set vehicle attitude target"""
-        await self.send_command({
+        return await self.send_command({
             'command': int(GameCommand.AttitudeTarget),
             'target': vehicle,
             'pitch': pitch,
@@ -252,7 +379,7 @@ class FlightSoftware:
     
     async def set_flaps(self, vehicle, angle):
         """Set flap angle"""
-        await self.send_command({
+        return await self.send_command({
             'command': int(GameCommand.Flaps),
             'target': vehicle,
             'value': angle
@@ -260,7 +387,7 @@ class FlightSoftware:
     
     async def set_grid_fins(self, vehicle, angle):
         """Set grid fin angle"""
-        await self.send_command({
+        return await self.send_command({
             'command': int(GameCommand.GridFins),
             'target': vehicle,
             'value': angle
@@ -269,7 +396,7 @@ class FlightSoftware:
     async def set_propellant(self, vehicle, mass_tons):
         """Set propellant mass in TONS (converts to kg for game)"""
         mass_kg = mass_tons * 1000  # Convert tons to kg for game
-        await self.send_command({
+        return await self.send_command({
             'command': int(GameCommand.Propellant),
             'target': vehicle,
             'value': mass_kg  # Game expects kg
@@ -277,14 +404,14 @@ class FlightSoftware:
     
     async def hot_stage(self):
         """Trigger hot staging"""
-        await self.send_command({
+        return await self.send_command({
             'command': int(GameCommand.HotStage),
             'target': 'ship'
         })
     
     async def detach_hsr(self):
         """Detach hot staging ring"""
-        await self.send_command({
+        return await self.send_command({
             'command': int(GameCommand.DetachHSR),
             'target': 'ship'
         })
@@ -294,15 +421,215 @@ class FlightSoftware:
         Wait until a condition is met
         condition_func: a function that returns True when condition is met
         timeout: maximum time to wait in seconds (None = infinite)
-        check_interval: how often to check the condition
+        check_interval: how often to check the condition between server messages
         """
-        start_time = time.time()
+        start_time = self.clock.monotonic()
         while not condition_func():
-            if timeout and (time.time() - start_time) > timeout:
+            elapsed = self.clock.monotonic() - start_time
+            if timeout and elapsed > timeout:
                 return False
-            await asyncio.sleep(check_interval)
+            # Re-check on every server message. In event-skip mode nothing changes between
+            # messages, so polling would only add wake-ups: just wake for the timeout
+            delay = check_interval
+            if getattr(self.clock, 'event_skip', False):
+                delay = max(timeout - elapsed, 0.001) + 0.001 if timeout else None
+            self.updated.clear()
+            sleeper = asyncio.ensure_future(self.clock.sleep(delay)) if delay else None
+            waker = asyncio.ensure_future(self.updated.wait())
+            try:
+                await asyncio.wait({sleeper, waker} - {None}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                if sleeper:
+                    sleeper.cancel()
+                waker.cancel()
         return True
     
+    # =========================================================================
+    # COUNTDOWN - T-time from the server's countdown clock
+    # =========================================================================
+    
+    def get_countdown_state(self):
+        """Get the countdown state, e.g. 'COUNTING', 'HOLD', 'LAUNCH' (None before the first update)"""
+        return self.countdown['state'] if self.countdown else None
+    
+    def get_t_minus(self):
+        """Get seconds until T-0 (negative after liftoff, None before the first update)"""
+        if not self.countdown:
+            return None
+        t = self.countdown['t']
+        if self.countdown.get('running'):
+            t -= self.clock.monotonic() - self.countdown_received_at
+        return t
+    
+    def get_mission_time(self):
+        """Get T-time in seconds: -10 is T-10, 160 is T+160 (None before the first update)"""
+        t_minus = self.get_t_minus()
+        return -t_minus if t_minus is not None else None
+    
+    async def wait_for_t(self, t, timeout=None):
+        """
+        Wait until the countdown reaches T-time t (e.g. -10 for T-10, 160 for T+160)
+        Holds pause the wait. Returns False on timeout.
+        """
+        start_time = self.clock.monotonic()
+        while True:
+            mission_time = self.get_mission_time()
+            if mission_time is not None and mission_time >= t:
+                return True
+            elapsed = self.clock.monotonic() - start_time
+            if timeout and elapsed > timeout:
+                return False
+            # Sleep right up to the target when counting, re-check often otherwise
+            delay = 0.1
+            if mission_time is not None and self.countdown.get('running'):
+                delay = min(max(t - mission_time, 0.001), 1.0)
+            if timeout:
+                delay = min(delay, max(timeout - elapsed, 0.001))
+            await self.clock.sleep(delay)
+    
+    async def send_countdown_command(self, action, **params):
+        """Send a countdown command, e.g. 'hold_at_t40', 'release_hold', 'abort' or 'jump' (seconds=60)"""
+        if self.connected and self.ws:
+            try:
+                await self.ws.send(json.dumps({
+                    'type': 'countdown_command',
+                    'action': action,
+                    **params
+                }))
+                self.log.step("Countdown command: %s", action, **params)
+                return True
+            except Exception as e:
+                self.log.error("Error sending countdown command: %s", e)
+                self.connected = False
+        return False
+    
+    # =========================================================================
+    # COMMAND CONFIRMATION - did the game act on it, and how fast?
+    # =========================================================================
+    
+    async def wait_for_command(self, command_id, timeout=None):
+        """
+        Wait until the server confirms a command (its effect showed up in telemetry)
+        Returns the ack, e.g. {'status': 'confirmed', 'latency': 0.12, ...}; status can also be
+        'timeout', 'failed' or 'unverifiable' (no visible effect, e.g. HotStage). None on our own timeout.
+        
+        e.g. command_id = await self.set_throttle('booster', 60)
+             ack = await self.wait_for_command(command_id)
+        """
+        pending = self.pending_commands.get(command_id)
+        if pending is None:
+            return self.command_acks.get(command_id)  # Already answered (or unknown)
+        future = pending[2]
+        sleeper = asyncio.ensure_future(self.clock.sleep(timeout)) if timeout else None
+        try:
+            await asyncio.wait({future, sleeper} - {None}, return_when=asyncio.FIRST_COMPLETED)
+            return future.result() if future.done() and not future.cancelled() else None
+        finally:
+            if sleeper:
+                sleeper.cancel()
+    
+    async def send_command_confirmed(self, command_data, timeout=10):
+        """Send a command and wait for its confirmation (returns the ack, or None)"""
+        command_id = await self.send_command(command_data, timeout=timeout)
+        if not command_id:
+            return None
+        # A little longer than the server's own timeout so its 'timeout' ack arrives
+        return await self.wait_for_command(command_id, timeout + 1)
+    
+    def get_command_latency(self):
+        """Round-trip latency (send to confirmation) per GameCommand, in ms"""
+        return {name: histogram.summary() for name, histogram in self.command_latency.items()}
+    
+    # =========================================================================
+    # ENGINE EVENTS - sent by the server only when engines change
+    # =========================================================================
+    
+    def get_running_engines(self, vehicle='booster'):
+        """Get the numbers of the running engines, e.g. [1, 2, 3]"""
+        return sorted(self.running_engines[vehicle])
+    
+    def get_engines_running(self, vehicle='booster'):
+        """Get how many engines are running"""
+        return len(self.running_engines[vehicle])
+    
+    async def wait_for_engine_event(self, vehicle=None, kind=None, timeout=None):
+        """
+        Wait for the next engine change and return the event
+        vehicle: 'booster', 'ship' or None for either
+        kind: 'lit', 'shutdown', 'engine_out' or None for any change
+        timeout: maximum time to wait in seconds (None = infinite), returns None on timeout
+        
+        e.g. event = await self.wait_for_engine_event('booster', 'engine_out')
+             self.log.step("Engine out: %s, %s running", event['engine_out'], event['running'])
+        """
+        future = asyncio.get_running_loop().create_future()
+        waiter = (vehicle, kind, future)
+        self.engine_waiters.append(waiter)
+        sleeper = asyncio.ensure_future(self.clock.sleep(timeout)) if timeout else None
+        try:
+            await asyncio.wait({future, sleeper} - {None}, return_when=asyncio.FIRST_COMPLETED)
+            return future.result() if future.done() else None
+        finally:
+            if sleeper:
+                sleeper.cancel()
+            if waiter in self.engine_waiters:
+                self.engine_waiters.remove(waiter)
+            future.cancel()
+    
+    # =========================================================================
+    # TRAJECTORY PREDICTION
+    # =========================================================================
+    
+    def start_predictor(self, interval=1.0, broadcast=True):
+        """Start refreshing ballistic predictions from the telemetry stream"""
+        if self.predictor_task and not self.predictor_task.done():
+            return
+        # Spawn, not fork: a forked worker would inherit every open socket, e.g. the server's
+        # game link when both run in one process, and keep it open after the game drops it
+        self.predictor_executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        self.predictor_task = asyncio.create_task(self._run_predictor(interval, broadcast))
+    
+    def stop_predictor(self):
+        """Stop the predictor and its worker process"""
+        if self.predictor_task:
+            self.predictor_task.cancel()
+            self.predictor_task = None
+        if self.predictor_executor:
+            self.predictor_executor.shutdown(wait=False, cancel_futures=True)
+            self.predictor_executor = None
+    
+    async def _run_predictor(self, interval, broadcast):
+        """Feed the latest state to the worker, one prediction at a time"""
+        loop = asyncio.get_running_loop()
+        while True:
+            vehicles = [vehicle for vehicle in ('booster', 'ship')
+                        if self.telemetry.get(vehicle) and 'location' in self.telemetry[vehicle]]
+            if vehicles:
+                try:
+                    # Heavy numeric work happens in the worker, the event loop only waits
+                    results = await loop.run_in_executor(
+                        self.predictor_executor,
+                        Trajectory.predict_batch,
+                        [self.telemetry[vehicle]['location'] for vehicle in vehicles],
+                        [self.get_velocity(vehicle) for vehicle in vehicles],
+                        [self.ballistic_coefficients[vehicle] for vehicle in vehicles]
+                    )
+                    for vehicle, result in zip(vehicles, results):
+                        result['objectname'] = self.telemetry[vehicle].get('objectname')
+                        self.predictions[vehicle] = result
+                    
+                    if broadcast and self.connected and self.ws:
+                        await self.ws.send(json.dumps({
+                            'type': 'prediction',
+                            'data': [self.predictions[vehicle] for vehicle in vehicles]
+                        }))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.log.error("Error predicting trajectory: %s", e)
+            
+            await self.clock.sleep(interval)
+    
     # =========================================================================
     # PROPELLANT FILLING LOGIC
     # =========================================================================
@@ -310,18 +637,17 @@ class FlightSoftware:
     async def start_propellant_filling(self):
         """Start the propellant filling process for both vehicles"""
         if self.filling_active:
-            print("Propellant filling already active!")
+            self.log.warning("Propellant filling already active!")
             return
         
         self.filling_active = True
-        self.ship_fill_start_time = time.time()
-        self.booster_fill_start_time = time.time()
+        self.ship_fill_start_time = self.clock.time()
+        self.booster_fill_start_time = self.clock.time()
         
-        print("=" * 60)
-        print("STARTING PROPELLANT FILLING SEQUENCE")
-        print(f"Ship S0: {self.ship_target_propellant} tons over {self.ship_fill_duration}s")
-        print(f"Booster B0: {self.booster_target_propellant} tons over {self.booster_fill_duration}s")
-        print("=" * 60)
+        self.log.step("STARTING PROPELLANT FILLING SEQUENCE")
+        self.log.step("Ship S0: %s tons over %ss", self.ship_target_propellant, self.ship_fill_duration, vehicle='ship')
+        self.log.step("Booster B0: %s tons over %ss", self.booster_target_propellant, self.booster_fill_duration,
+                      vehicle='booster')
         
         # Start both filling tasks
         asyncio.create_task(self._fill_ship_propellant())
@@ -329,20 +655,20 @@ class FlightSoftware:
     
     async def _fill_ship_propellant(self):
         """Fill ship propellant gradually over time"""
-        print(f"Waiting {self.ship_initial_wait}s before starting ship fill...")
-        await asyncio.sleep(self.ship_initial_wait)
+        self.log.step("Waiting %ss before starting ship fill...", self.ship_initial_wait, vehicle='ship')
+        await self.clock.sleep(self.ship_initial_wait)
         
-        print("Starting ship propellant fill...")
-        start_fill_time = time.time()
+        self.log.step("Starting ship propellant fill...", vehicle='ship')
+        start_fill_time = self.clock.monotonic()
         
         while self.filling_active:
-            current_time = time.time()
+            current_time = self.clock.monotonic()
             elapsed_fill_time = current_time - start_fill_time
             
             if elapsed_fill_time >= self.ship_fill_duration:
                 # Final fill to exact target
                 await self.set_propellant('S0', self.ship_target_propellant)
-                print(f"Ship propellant fill COMPLETE: {self.ship_target_propellant} tons")
+                self.log.step("Ship propellant fill COMPLETE: %s tons", self.ship_target_propellant, vehicle='ship')
                 break
             
             # Calculate current target based on linear progression
@@ -355,28 +681,28 @@ class FlightSoftware:
             # Check if we've reached target early
             current_propellant = self.get_total_propellant('ship')
             if current_propellant >= self.ship_target_propellant:
-                print(f"Ship propellant reached target early: {current_propellant} tons")
+                self.log.step("Ship propellant reached target early: %s tons", current_propellant, vehicle='ship')
                 break
             
             # Update every 5 seconds
-            await asyncio.sleep(5)
+            await self.clock.sleep(5)
     
     async def _fill_booster_propellant(self):
         """Fill booster propellant gradually over time"""
-        print(f"Waiting {self.booster_initial_wait}s before starting booster fill...")
-        await asyncio.sleep(self.booster_initial_wait)
+        self.log.step("Waiting %ss before starting booster fill...", self.booster_initial_wait, vehicle='booster')
+        await self.clock.sleep(self.booster_initial_wait)
         
-        print("Starting booster propellant fill...")
-        start_fill_time = time.time()
+        self.log.step("Starting booster propellant fill...", vehicle='booster')
+        start_fill_time = self.clock.monotonic()
         
         while self.filling_active:
-            current_time = time.time()
+            current_time = self.clock.monotonic()
             elapsed_fill_time = current_time - start_fill_time
             
             if elapsed_fill_time >= self.booster_fill_duration:
                 # Final fill to exact target
                 await self.set_propellant('B0', self.booster_target_propellant)
-                print(f"Booster propellant fill COMPLETE: {self.booster_target_propellant} tons")
+                self.log.step("Booster propellant fill COMPLETE: %s tons", self.booster_target_propellant, vehicle='booster')
                 break
             
             # Calculate current target based on linear progression
@@ -389,16 +715,16 @@ class FlightSoftware:
             # Check if we've reached target early
             current_propellant = self.get_total_propellant('booster')
             if current_propellant >= self.booster_target_propellant:
-                print(f"Booster propellant reached target early: {current_propellant} tons")
+                self.log.step("Booster propellant reached target early: %s tons", current_propellant, vehicle='booster')
                 break
             
             # Update every 5 seconds
-            await asyncio.sleep(5)
+            await self.clock.sleep(5)
     
     def stop_propellant_filling(self):
         """Stop the propellant filling process"""
         self.filling_active = False
-        print("Propellant filling stopped")
+        self.log.step("Propellant filling stopped")
     
     # =========================================================================
     # ASCENT SCRIPTS - FILL THESE IN!
@@ -411,7 +737,7 @@ class FlightSoftware:
         Your flight control code goes here!
         Use the helper methods above to control the rocket.
         """
-        print("Executing Ascent Script 1 (No Roll, Downwards Flip)")
+        self.log.step("Executing Ascent Script 1 (No Roll, Downwards Flip)")
         
         # Start propellant filling automatically
         await self.start_propellant_filling()
@@ -421,14 +747,14 @@ class FlightSoftware:
         # =====================================================================
         
         # Example: Wait for propellant to be filled before continuing
-        print("Waiting for propellant filling to complete...")
+        self.log.step("Waiting for propellant filling to complete...")
         await self.wait_for_condition(
             lambda: (self.get_total_propellant('ship') >= self.ship_target_propellant and 
                     self.get_total_propellant('booster') >= self.booster_target_propellant),
             timeout=3600  # 1 hour timeout
         )
         
-        print("Propellant filled! Ready for launch sequence.")
+        self.log.step("Propellant filled! Ready for launch sequence.")
         
         # ADD YOUR LAUNCH CODE HERE
         # Example:
@@ -445,7 +771,7 @@ class FlightSoftware:
         
         Your flight control code goes here!
         """
-        print("Executing Ascent Script 2 (Roll, Upwards Flip)")
+        self.log.step("Executing Ascent Script 2 (Roll, Upwards Flip)")
         
         # Start propellant filling automatically
         await self.start_propellant_filling()
@@ -455,14 +781,14 @@ class FlightSoftware:
         # =====================================================================
         
         # Example: Wait for propellant to be filled before continuing
-        print("Waiting for propellant filling to complete...")
+        self.log.step("Waiting for propellant filling to complete...")
         await self.wait_for_condition(
             lambda: (self.get_total_propellant('ship') >= self.ship_target_propellant and 
                     self.get_total_propellant('booster') >= self.booster_target_propellant),
             timeout=3600  # 1 hour timeout
         )
         
-        print("Propellant filled! Ready for launch sequence.")
+        self.log.step("Propellant filled! Ready for launch sequence.")
         
         # ADD YOUR LAUNCH CODE HERE
         # This script can have different behavior than script 1
@@ -475,7 +801,7 @@ class FlightSoftware:
     
     async def booster_script_1(self):
         """BOOSTER SCRIPT 1 - Catch"""
-        print("Executing Booster Script 1 (Catch)")
+        self.log.step("Executing Booster Script 1 (Catch)")
         
         # =====================================================================
         # YOUR CUSTOM BOOSTER CODE GOES HERE!
@@ -487,7 +813,7 @@ class FlightSoftware:
     
     async def booster_script_2(self):
         """BOOSTER SCRIPT 2 - B13 Profile"""
-        print("Executing Booster Script 2 (B13 Profile)")
+        self.log.step("Executing Booster Script 2 (B13 Profile)")
         
         # =====================================================================
         # YOUR CUSTOM BOOSTER CODE GOES HERE!
@@ -497,7 +823,7 @@ class FlightSoftware:
     
     async def booster_script_3(self):
         """BOOSTER SCRIPT 3 - B14-2 Profile"""
-        print("Executing Booster Script 3 (B14-2 Profile)")
+        self.log.step("Executing Booster Script 3 (B14-2 Profile)")
         
         # =====================================================================
         # YOUR CUSTOM BOOSTER CODE GOES HERE!
@@ -507,7 +833,7 @@ class FlightSoftware:
     
     async def booster_script_4(self):
         """BOOSTER SCRIPT 4 - B15-2 Profile"""
-        print("Executing Booster Script 4 (B15-2 Profile)")
+        self.log.step("Executing Booster Script 4 (B15-2 Profile)")
         
         # =====================================================================
         # YOUR CUSTOM BOOSTER CODE GOES HERE!
@@ -517,7 +843,7 @@ class FlightSoftware:
     
     async def booster_script_5(self):
         """BOOSTER SCRIPT 5 - B16 Profile, Recommended"""
-        print("Executing Booster Script 5 (B16 Profile, Recommended)")
+        self.log.step("Executing Booster Script 5 (B16 Profile, Recommended)")
         
         # =====================================================================
         # YOUR CUSTOM BOOSTER CODE GOES HERE!
@@ -531,7 +857,7 @@ class FlightSoftware:
     
     async def ship_script_1(self):
         """SHIP SCRIPT 1 - Normal Reentry"""
-        print("Executing Ship Script 1 (Normal Reentry)")
+        self.log.step("Executing Ship Script 1 (Normal Reentry)")
         
         # =====================================================================
         # YOUR CUSTOM SHIP CODE GOES HERE!
@@ -543,7 +869,7 @@ class FlightSoftware:
     
     async def ship_script_2(self):
         """SHIP SCRIPT 2 - Hypersonic Drifting Reentry"""
-        print("Executing Ship Script 2 (Hypersonic Drifting Reentry)")
+        self.log.step("Executing Ship Script 2 (Hypersonic Drifting Reentry)")
         
         # =====================================================================
         # YOUR CUSTOM SHIP CODE GOES HERE!
@@ -582,9 +908,7 @@ class FlightSoftware:
     
     async def execute_full_launch(self):
         """Execute full launch sequence with all scripts"""
-        print("=" * 60)
-        print("STARTING FULL LAUNCH SEQUENCE")
-        print("=" * 60)
+        self.log.step("STARTING FULL LAUNCH SEQUENCE")
         
         # Start ascent (which includes propellant filling)
         await self.execute_ascent()
@@ -592,9 +916,7 @@ class FlightSoftware:
         # Booster and ship scripts would be triggered by staging events
         # You can add logic here to detect staging and trigger the appropriate scripts
         
-        print("=" * 60)
-        print("LAUNCH SEQUENCE COMPLETE")
-        print("=" * 60)
+        self.log.step("LAUNCH SEQUENCE COMPLETE")
     
     # =========================================================================
     # MAIN LOOP
@@ -606,12 +928,15 @@ class FlightSoftware:
         
         # Connect to server
         if not await self.connect():
-            print("Failed to connect to server. Make sure server.py is running!")
+            self.log.error("Failed to connect to server. Make sure server.py is running!")
             return
         
         # Start telemetry receiver
         asyncio.create_task(self.receive_telemetry())
         
+        # Start trajectory predictor (apogee, impact point, time to ground)
+        self.start_predictor()
+        
         print("=" * 60)
         print("Flight Software Ready!")
         print("=" * 60)
@@ -626,9 +951,10 @@ class FlightSoftware:
         print("=" * 60)
         
         # Simple command handler
+        commands = self.start_command_reader()
         while self.running:
             try:
-                command = await asyncio.get_event_loop().run_in_executor(None, input, "Enter command: ")
+                command = await commands.get()
                 command = command.strip().lower()
                 
                 if command == 'ascent1':
@@ -664,11 +990,48 @@ class FlightSoftware:
                 self.running = False
                 break
             except Exception as e:
-                print(f"Error processing command: {e}")
+                self.log.error("Error processing command: %s", e)
+        
+        await self.shutdown()
+    
+    def start_command_reader(self):
+        """
+        Read console commands on a daemon thread into a queue, so shutting
+        down never has to wait for input() to return. Stops quietly when
+        stdin is closed (e.g. running headless as a service).
+        """
+        loop = asyncio.get_running_loop()
+        commands = asyncio.Queue()
+        
+        def read_commands():
+            while True:
+                try:
+                    line = input("Enter command: ")
+                except (EOFError, KeyboardInterrupt, RuntimeError):
+                    return
+                try:
+                    loop.call_soon_threadsafe(commands.put_nowait, line)
+                except RuntimeError:
+                    return  # Event loop already closed
+        
+        threading.Thread(target=read_commands, daemon=True).start()
+        return commands
+    
+    async def shutdown(self):
+        """Stop scripts, the predictor and the server connection"""
+        self.running = False
+        self.filling_active = False
+        self.stop_predictor()
+        if self.ws:
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+        self.connected = False
 
-async def main():
+async def main(clock=None):
     """Entry point"""
-    flight_software = FlightSoftware()
+    flight_software = FlightSoftware(clock=clock)
     
     # You can manually trigger scripts here for testing:
     await flight_software.run()
@@ -679,9 +1042,19 @@ async def main():
     # await flight_software.execute_ship()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="StarbaseSim Flight Software")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Run script timing N times faster than real time (e.g. 60)")
+    parser.add_argument("--journal", default=EventLog.DEFAULT_JOURNAL,
+                        help=f"Event journal file, '' to disable (default {EventLog.DEFAULT_JOURNAL})")
+    args = parser.parse_args()
+    EventLog.start(args.journal or None)
+
     print("=" * 60)
     print("StarbaseSim Flight Software")
     print("=" * 60)
     print("Make sure server.py is running first!")
+    if args.speed:
+        print(f"Simulated clock: {args.speed}x real time")
     print("=" * 60)
-    asyncio.run(main())
+    asyncio.run(main(SimulatedClock(speed=args.speed) if args.speed else None))
@@ -0,0 +1,56 @@
+"""
+StarbaseSim Launch Control - Game Commands
+Command numbers of the StarbaseSim TCP protocol, shared by the server, the
+flight software and the server-side trackers
+"""
+
+from enum import IntEnum, auto
+
+class GameCommand(IntEnum):
+    NONE = 0
+    SendDataTick = auto()
+    SetWhoSendsData = auto()
+    SetRocketSetting = auto()
+    SpawnAtLocation = auto()
+    Engines = auto()
+    Raptor = auto()
+    Throttle = auto()
+    RCS = auto()
+    Flaps = auto()
+    FoldFlaps = auto()
+    GridFins = auto()
+    Gimbals = auto()
+    SetRCSManual = auto()
+    SetDragManual = auto()
+    SetGimbalManual = auto()
+    Propellant = auto()
+    CryotankPressure = auto()
+    HotStage = auto()
+    DetachHSR = auto()
+    FTS = auto()
+    OuterGimbalEngines = auto()
+    BoosterClamps = auto()
+    ControllerAltitude = auto()
+    ControllerEastNorth = auto()
+    ControllerAttitude = auto()
+    AttitudeTarget = auto()
+    ChillValve = auto()
+    DumpFuel = auto()
+    PopEngine = auto()
+    BigFlame = auto()
+    Chopsticks = auto()
+    PadADeluge = auto()
+    PadASQDQuickRetract = auto()
+    PadAOLMQuickRetract = auto()
+    PadABQDQuickRetract = auto()
+    MasseyDeluge = auto()
+    PadAOLMClampsExtend = auto()
+    PadAOLMRQDExtend = auto()
+    PadASpawnStack = auto()
+
+def command_name(command):
+    """Enum name of a command number (e.g. 7 -> 'Throttle'), or the number itself as text"""
+    try:
+        return GameCommand(command).name
+    except ValueError:
+        return str(command)
@@ -1,41 +1,30 @@
 """
 StarbaseSim Launch Control - Main Launcher
 Starts server, flight software, and opens UI window
+Run with --headless to skip the window (no browser engine is loaded)
 """
 
-import webview
 import threading
 import asyncio
-import sys
-import os
+import argparse
+import multiprocessing
+import signal
 from pathlib import Path
 
 # Import our modules
 import Server
 import FlightSoftware
+import EventLog
 
 class LaunchControlApp:
     def __init__(self):
         self.server_running = False
         self.flight_software_running = False
         self.html_path = None
-        
-    def get_html_content(self):
-        """Load HTML file content"""
-        # When running as .exe, files are in _MEIPASS temp directory
-        if getattr(sys, 'frozen', False):
-            base_path = sys._MEIPASS
-        else:
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        
-        html_file = os.path.join(base_path, 'LaunchControl.html')
-        
-        try:
-            with open(html_file, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            print(f"Error loading HTML: {e}")
-            return "<h1>Error loading LaunchControl.html</h1>"
+    
+    def get_ui_url(self, host="localhost", port=8765):
+        """The server serves LaunchControl.html on its websocket port"""
+        return f"http://{host}:{port}/"
     
     def start_server(self):
         """Start the WebSocket server in background thread"""
@@ -70,6 +59,9 @@ class LaunchControlApp:
     
     def run(self):
         """Main application entry point"""
+        # Only the windowed mode needs the browser engine
+        import webview
+        
         print("=" * 60)
         print("StarbaseSim Launch Control")
         print("=" * 60)
@@ -84,14 +76,11 @@ class LaunchControlApp:
         import time
         time.sleep(1)
         
-        # Get HTML content
-        html_content = self.get_html_content()
-        
-        # Create window with PyWebView
+        # Create window with PyWebView, loading the UI from the server
         print(">> Opening Launch Control window...")
         window = webview.create_window(
             title='StarbaseSim Launch Control',
-            html=html_content,
+            url=self.get_ui_url(),
             width=1600,
             height=900,
             resizable=True,
@@ -104,11 +93,74 @@ class LaunchControlApp:
         webview.start(debug=False)  # Set debug=True if YOU need to debug
         
         print(">> Launch Control closed")
+    
+    # =========================================================================
+    # HEADLESS MODE
+    # =========================================================================
+    
+    def run_headless(self, host="localhost", port=8765):
+        """Run server and flight software without a window"""
+        print("=" * 60)
+        print("StarbaseSim Launch Control (headless)")
+        print("=" * 60)
+        asyncio.run(self._run_headless(host, port))
+        print(">> Launch Control stopped")
+    
+    async def _run_headless(self, host, port):
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                # Windows: no loop signal handlers
+                signal.signal(sig, lambda *args: loop.call_soon_threadsafe(stop.set))
+        
+        print(">> Starting Server...")
+        server_task = asyncio.create_task(Server.main(host, port))
+        self.server_running = True
+        await asyncio.sleep(1)  # Let the server bind before connecting to it
+        
+        print(">> Starting Flight Software...")
+        local_host = "localhost" if host in ("", "0.0.0.0", "::") else host
+        flight_software = FlightSoftware.FlightSoftware(server_url=f"ws://{local_host}:{port}")
+        flight_task = asyncio.create_task(flight_software.run())
+        self.flight_software_running = True
+        
+        # Run until a signal arrives or the flight software exits (e.g. 'quit')
+        stop_task = asyncio.create_task(stop.wait())
+        await asyncio.wait({stop_task, flight_task}, return_when=asyncio.FIRST_COMPLETED)
+        
+        print(">> Shutting down...")
+        stop_task.cancel()
+        await flight_software.shutdown()
+        flight_task.cancel()
+        self.flight_software_running = False
+        server_task.cancel()
+        await asyncio.gather(flight_task, server_task, return_exceptions=True)
+        self.server_running = False
 
 def main():
     """Entry point"""
+    parser = argparse.ArgumentParser(description="StarbaseSim Launch Control")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run server and flight software without the window")
+    parser.add_argument("--host", default="localhost",
+                        help="Interface the headless server listens on, e.g. 0.0.0.0 for remote viewing")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="HTTP and WebSocket port in headless mode (default 8765)")
+    parser.add_argument("--journal", default=EventLog.DEFAULT_JOURNAL,
+                        help=f"Event journal of commands and script steps, '' to disable (default {EventLog.DEFAULT_JOURNAL})")
+    args = parser.parse_args()
+    EventLog.start(args.journal or None)
+    
     app = LaunchControlApp()
-    app.run()
+    if args.headless:
+        app.run_headless(args.host, args.port)
+    else:
+        app.run()
 
 if __name__ == '__main__':
+    # Needed for the trajectory predictor's worker process in the frozen .exe
+    multiprocessing.freeze_support()
     main()
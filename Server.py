@@ -2,57 +2,143 @@ import asyncio
 import websockets
 import socket
 import json
+import math
 import threading
-from enum import IntEnum, auto
-
-class GameCommand(IntEnum):
-    NONE = 0
-    SendDataTick = auto()
-    SetWhoSendsData = auto()
-    SetRocketSetting = auto()
-    SpawnAtLocation = auto()
-    Engines = auto()
-    Raptor = auto()
-    Throttle = auto()
-    RCS = auto()
-    Flaps = auto()
-    FoldFlaps = auto()
-    GridFins = auto()
-    Gimbals = auto()
-    SetRCSManual = auto()
-    SetDragManual = auto()
-    SetGimbalManual = auto()
-    Propellant = auto()
-    CryotankPressure = auto()
-    HotStage = auto()
-    DetachHSR = auto()
-    FTS = auto()
-    OuterGimbalEngines = auto()
-    BoosterClamps = auto()
-    ControllerAltitude = auto()
-    ControllerEastNorth = auto()
-    ControllerAttitude = auto()
-    AttitudeTarget = auto()
-    ChillValve = auto()
-    DumpFuel = auto()
-    PopEngine = auto()
-    BigFlame = auto()
-    Chopsticks = auto()
-    PadADeluge = auto()
-    PadASQDQuickRetract = auto()
-    PadAOLMQuickRetract = auto()
-    PadABQDQuickRetract = auto()
-    MasseyDeluge = auto()
-    PadAOLMClampsExtend = auto()
-    PadAOLMRQDExtend = auto()
-    PadASpawnStack = auto()
+import argparse
+
+from Clock import Clock
+from GameCommand import GameCommand
+from Countdown import Countdown
+from EngineEvents import EngineTracker
+from CommandTracker import CommandTracker
+import EventLog
+from TelemetryHistory import TelemetryHistory
+from WebAssets import WebAssets
+
+class TickRateManager:
+    """
+    Chooses the game's data tick rate from flight phase and consumer demand.
+    Rates go up immediately and only come down after demand has stayed lower
+    for LOWER_AFTER seconds, so the game isn't re-ticked on every wobble.
+    """
+    RATES = (1, 2, 5, 10, 20, 50)  # Hz steps the tick moves between
+    IDLE_RATE = 1  # Nothing happening (e.g. on the pad during propellant load)
+    ENGINES_RATE = 10  # Any engine running
+    DESCENT_RATE = 20  # Descending below DESCENT_ALTITUDE
+    LANDING_RATE = 50  # Engines running while descending below DESCENT_ALTITUDE
+    DESCENT_ALTITUDE = 5000  # m
+    DESCENT_SPEED = 1.0  # m/s sink rate that counts as descending, below it is jitter (e.g. on the pad)
+    LOWER_AFTER = 10  # seconds
+    PHASE_TIMEOUT = 3  # seconds without a frame before a vehicle's phase stops counting (3 ticks at IDLE_RATE)
+
+    def __init__(self, clock, initial_rate=10):
+        self.clock = clock
+        self.rate = initial_rate
+        self.phase_rates = {}  # objectname -> (rate wanted by its flight phase, time of its last frame)
+        self.subscriptions = {}  # client -> requested rate
+        self.lower_since = None
+        self.changes = 0
+
+    def step_up(self, rate):
+        """Round a requested rate up to the next supported step"""
+        for step in self.RATES:
+            if rate <= step:
+                return step
+        return self.RATES[-1]
+
+    def phase_rate(self, telemetry):
+        """Rate the flight phase of one vehicle needs"""
+        engines_running = bool(telemetry.get('enginesThatAreRunningBitmask'))
+        location = telemetry.get('location') or [0, 0, 0]
+        velocity = telemetry.get('velocity') or [0, 0, 0]
+        descending = velocity[2] < -self.DESCENT_SPEED and 0 < location[2] < self.DESCENT_ALTITUDE
+
+        if engines_running and descending:
+            return self.LANDING_RATE
+        if descending:
+            return self.DESCENT_RATE
+        if engines_running:
+            return self.ENGINES_RATE
+        return self.IDLE_RATE
+
+    def observe(self, telemetry):
+        objectname = telemetry.get('objectname')
+        if objectname:
+            self.phase_rates[objectname] = (self.phase_rate(telemetry), self.clock.monotonic())
+
+    def expire_phases(self):
+        """Forget vehicles that stopped reporting (destroyed, despawned, respawned under a new name)"""
+        cutoff = self.clock.monotonic() - self.PHASE_TIMEOUT
+        for objectname, (_, seen) in list(self.phase_rates.items()):
+            if seen < cutoff:
+                del self.phase_rates[objectname]
+
+    def clear_phases(self):
+        """Game link dropped, no vehicle is reporting any more"""
+        self.phase_rates.clear()
+
+    def subscribe(self, client, rate):
+        try:
+            rate = float(rate)
+        except (TypeError, ValueError):
+            return
+        self.subscriptions[client] = self.step_up(max(0, rate))
+
+    def unsubscribe(self, client):
+        self.subscriptions.pop(client, None)
+
+    def desired_rate(self):
+        self.expire_phases()
+        phase_rates = [rate for rate, _ in self.phase_rates.values()]
+        return max([self.IDLE_RATE, *phase_rates, *self.subscriptions.values()])
+
+    def update(self):
+        """Returns the new rate if the tick should change, otherwise None"""
+        desired = self.desired_rate()
+        if desired > self.rate:
+            self.lower_since = None
+        elif desired < self.rate:
+            now = self.clock.monotonic()
+            if self.lower_since is None:
+                self.lower_since = now
+            if now - self.lower_since < self.LOWER_AFTER:
+                return None
+            self.lower_since = None
+        else:
+            self.lower_since = None
+            return None
+
+        self.rate = desired
+        self.changes += 1
+        return desired
+
+    def get_metrics(self):
+        return {
+            "tick_rate": self.rate,
+            "desired_rate": self.desired_rate(),
+            "tick_changes": self.changes,
+            "subscriptions": len(self.subscriptions)
+        }
 
 class GameController:
-    def __init__(self):
+    VEHICLE_TIMEOUT = 60  # seconds without a frame, while others still report, before a vehicle is forgotten
+    
+    def __init__(self, clock=None):
+        self.clock = clock or Clock()
+        self.log = EventLog.EventLog('server', self.clock)
         self.game_socket = None
         self.connected = False
         self.buffer = ""
         self.websocket_clients = set()
+        self.tick_rate = TickRateManager(self.clock)
+        self.last_values = {}  # objectname -> latest telemetry, for late joiners
+        self.last_seen = {}  # objectname -> time of its last frame
+        self.history = TelemetryHistory()
+        self.engines = EngineTracker()  # Engine bitmask -> change events
+        self.commands = CommandTracker(self.clock)
+        self.ring = None  # Shared-memory ring when running with fan-out workers
+        self.reply_queues = None  # Per-worker reply queues when running with fan-out workers
+        self.countdown = Countdown(self.clock, self.broadcast_to_clients, self.send_to_game)
         
     def connect_to_game(self):
         """Connect to StarbaseSim game server"""
@@ -61,44 +147,210 @@ class GameController:
             self.game_socket.connect(("localhost", 12345))
             self.game_socket.settimeout(0.1)
             self.connected = True
-            print("Connected to StarbaseSim game server")
+            self.log.info("Connected to StarbaseSim game server")
             
-            # Request data updates
-            self.send_to_game({
-                "command": int(GameCommand.SendDataTick),
-                "value": 0.1
-            })
+            # Request data updates at the current managed rate
+            self.send_data_tick()
             return True
         except Exception as e:
-            print(f"Failed to connect to game: {e}")
+            self.log.warning("Failed to connect to game: %s", e)
             self.connected = False
             return False
     
-    def send_to_game(self, command_data):
-        """Send command to game"""
+    def send_to_game(self, command_data, client=None, command_id=None, timeout=None):
+        """Send command to game, and watch telemetry for its effect"""
         if self.connected and self.game_socket:
             try:
                 self.game_socket.send((json.dumps(command_data) + "\n").encode())
+                self.engines.command_sent(command_data)
+                self.commands.sent(command_data, client, command_id, timeout)
+                self.log.command(command_data, id=command_id)
                 return True
             except Exception as e:
-                print(f"Error sending to game: {e}")
+                self.log.error("Error sending to game: %s", e, command=self.command_of(command_data),
+                               event='command_failed', data=command_data)
                 self.connected = False
+                self.tick_rate.clear_phases()
+                return False
+        self.log.warning("Game not connected, command dropped", command=self.command_of(command_data),
+                         journal=True, event='command_dropped', data=command_data)
         return False
     
+    def command_of(self, command_data):
+        return command_data.get("command") if isinstance(command_data, dict) else None
+    
+    def send_data_tick(self):
+        """Tell the game how often to send telemetry"""
+        return self.send_to_game({
+            "command": int(GameCommand.SendDataTick),
+            "value": 1 / self.tick_rate.rate
+        })
+
+    def update_tick_rate(self):
+        """Re-tick the game if flight phase or client demand changed"""
+        new_rate = self.tick_rate.update()
+        if new_rate is not None:
+            self.log.info("Telemetry rate -> %s Hz", new_rate)
+            self.send_data_tick()
+
+    def cache_telemetry(self, telemetry):
+        """Keep the latest values for each object, updated in place"""
+        objectname = telemetry.get('objectname')
+        if objectname:
+            cached = self.last_values.get(objectname)
+            if cached is None:
+                self.last_values[objectname] = dict(telemetry)
+            else:
+                cached.update(telemetry)
+            self.last_seen[objectname] = self.clock.monotonic()
+        self.forget_stale_vehicles()
+    
+    def forget_stale_vehicles(self):
+        """Drop vehicles that stopped reporting (destroyed, despawned, respawned under a new name)"""
+        cutoff = self.clock.monotonic() - self.VEHICLE_TIMEOUT
+        for objectname, seen in list(self.last_seen.items()):
+            if seen < cutoff:
+                del self.last_seen[objectname]
+                self.last_values.pop(objectname, None)
+                self.engines.forget(objectname)
+
+    def get_snapshot(self):
+        """Full state message for clients that just connected or asked for it"""
+        return {
+            "type": "snapshot",
+            "connected": self.connected,
+            "data": list(self.last_values.values()),
+            "engines": self.engines.get_state(),
+            "countdown": self.countdown.get_state()
+        }
+
+    def get_history(self, request):
+        """Answer a get_history request with downsampled rollups"""
+        now = self.clock.time()
+        try:
+            end = float(request.get("end", now))
+            start = float(request.get("start", end - 3600))
+            points = float(request.get("points", 500))
+            if not all(math.isfinite(value) for value in (start, end, points)):
+                raise ValueError("non-finite number")  # e.g. 1e400 in the JSON
+            points = max(0, int(points))
+            fields = [str(field) for field in request.get("fields", [])]
+        except (TypeError, ValueError):
+            return {"type": "history", "id": request.get("id"), "error": "Invalid history request"}
+
+        result = self.history.query(request.get("objectname"), fields, start, end, points)
+        return {"type": "history", "id": request.get("id"), **result}
+
     async def broadcast_to_clients(self, message):
-        """Send data to all connected web clients"""
-        if self.websocket_clients:
+        """Send data to all connected web clients (or the fan-out ring)"""
+        encoded = json.dumps(message)
+        if self.ring is not None:
+            self.ring.write(encoded.encode())
+        elif self.websocket_clients:
             await asyncio.gather(
-                *[client.send(json.dumps(message)) for client in self.websocket_clients],
+                *[client.send(encoded) for client in self.websocket_clients],
                 return_exceptions=True
             )
     
+    async def handle_request(self, data, client):
+        """Handle one message from a web client, returns the reply to send back (if any)"""
+        command_type = data.get("type")
+        
+        if command_type == "game_command":
+            # Forward command to game. With an "id" the client gets a command_ack once
+            # telemetry confirms it (or it times out after "timeout" seconds).
+            command_id = data.get("id")
+            sent = self.send_to_game(data.get("command"), client, command_id, data.get("timeout"))
+            if not sent and command_id is not None:
+                return {
+                    "type": "command_ack",
+                    "id": command_id,
+                    "command": self.command_of(data.get("command")),
+                    "status": "failed",
+                    "latency": None
+                }
+        
+        elif command_type == "prediction":
+            # Trajectory prediction from FlightSoftware, pass on to the consoles
+            await self.broadcast_to_clients(data)
+        
+        elif command_type == "subscribe":
+            # Client wants telemetry at (at least) this rate in Hz
+            self.tick_rate.subscribe(client, data.get("rate", 0))
+            self.update_tick_rate()
+        
+        elif command_type == "get_snapshot":
+            return self.get_snapshot()
+        
+        elif command_type == "get_history":
+            # e.g. {"type": "get_history", "objectname": "B0", "fields": ["location.2"],
+            #       "start": <epoch s>, "end": <epoch s>, "points": 500}
+            return self.get_history(data)
+        
+        elif command_type == "get_metrics":
+            return {"type": "metrics", **self.tick_rate.get_metrics(), **self.commands.get_metrics()}
+        
+        elif command_type == "countdown_command":
+            # e.g. {"type": "countdown_command", "action": "jump", "seconds": 60}
+            await self.countdown.handle_command(data)
+        
+        elif command_type == "get_countdown":
+            return self.countdown.get_state()
+        
+        elif command_type == "clock_sync":
+            # Client estimates its offset to the server clock from the round trip
+            return {
+                "type": "clock_sync",
+                "client_time": data.get("client_time"),
+                "server_time": self.clock.time()
+            }
+        
+        return None
+    
+    def client_disconnected(self, client):
+        """Forget per-client state"""
+        self.tick_rate.unsubscribe(client)
+        self.commands.client_disconnected(client)
+    
+    async def send_to_client(self, client, message):
+        """Send a message to one client (directly, or through its fan-out worker)"""
+        if self.reply_queues is not None:
+            index, client_id = client
+            self.reply_queues[index].put((client_id, json.dumps(message)))
+            return
+        try:
+            await client.send(json.dumps(message))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+    
+    async def send_command_acks(self, acks):
+        for client, ack in acks:
+            await self.send_to_client(client, ack)
+    
+    async def handle_frame(self, json_data):
+        """Process one telemetry frame from the game"""
+        self.cache_telemetry(json_data)
+        self.history.add(json_data, self.clock.time())
+        self.tick_rate.observe(json_data)
+        self.update_tick_rate()
+        # Broadcast to all web clients
+        await self.broadcast_to_clients({
+            "type": "telemetry",
+            "data": json_data
+        })
+        # Engine events only on frames where the bitmask changed
+        engine_event = self.engines.observe(json_data)
+        if engine_event is not None:
+            await self.broadcast_to_clients(engine_event)
+        await self.send_command_acks(self.commands.observe(json_data))
+    
     async def receive_from_game(self):
         """Receive data from game and broadcast to web clients"""
         while True:
+            await self.send_command_acks(self.commands.expire())
             if not self.connected:
                 if not self.connect_to_game():
-                    await asyncio.sleep(1)
+                    await self.clock.sleep(1)
                     continue
             
             try:
@@ -115,20 +367,23 @@ class GameController:
                     if message and message != "Client still there?":
                         try:
                             json_data = json.loads(message)
-                            # Broadcast to all web clients
-                            await self.broadcast_to_clients({
-                                "type": "telemetry",
-                                "data": json_data
-                            })
                         except json.JSONDecodeError:
-                            pass
+                            continue
+                        if not isinstance(json_data, dict):
+                            continue  # Not a telemetry frame
+                        try:
+                            await self.handle_frame(json_data)
+                        except Exception as e:
+                            # One malformed frame must not take the game link down
+                            self.log.warning("Error handling game frame: %s", e, data=json_data)
                             
             except socket.timeout:
                 await asyncio.sleep(0.01)
             except Exception as e:
-                print(f"Error receiving from game: {e}")
+                self.log.warning("Error receiving from game: %s", e)
                 self.connected = False
-                await asyncio.sleep(1)
+                self.tick_rate.clear_phases()
+                await self.clock.sleep(1)
 
 # Global controller instance
 controller = GameController()
@@ -136,47 +391,73 @@ controller = GameController()
 async def handle_websocket(websocket):
     """Handle WebSocket connections from web UI"""
     controller.websocket_clients.add(websocket)
-    print(f"Web client connected (total: {len(controller.websocket_clients)})")
+    controller.log.info("Web client connected (total: %d)", len(controller.websocket_clients))
     
     try:
         # Send connection status
         await websocket.send(json.dumps({
             "type": "status",
-            "connected": controller.connected
+            "connected": controller.connected,
+            "tick_rate": controller.tick_rate.rate
         }))
         
+        # Paint the client straight away with the last known values
+        await websocket.send(json.dumps(controller.get_snapshot()))
+        
         async for message in websocket:
             try:
                 data = json.loads(message)
-                command_type = data.get("type")
-                
-                if command_type == "game_command":
-                    # Forward command to game
-                    controller.send_to_game(data.get("command"))
+                reply = await controller.handle_request(data, websocket)
+                if reply is not None:
+                    await websocket.send(json.dumps(reply))
                     
             except json.JSONDecodeError:
-                print(f"Invalid JSON from client: {message}")
+                controller.log.warning("Invalid JSON from client: %s", message[:200])
                 
     except websockets.exceptions.ConnectionClosed:
         pass
     finally:
         controller.websocket_clients.discard(websocket)
-        print(f"Web client disconnected (total: {len(controller.websocket_clients)})")
+        controller.client_disconnected(websocket)
+        controller.log.info("Web client disconnected (total: %d)", len(controller.websocket_clients))
 
-async def main():
+async def main(host="localhost", port=8765):
     # Start game receiver task
-    asyncio.create_task(controller.receive_from_game())
+    receiver = asyncio.create_task(controller.receive_from_game())
+    countdown = asyncio.create_task(controller.countdown.run())
     
-    # Start WebSocket server for web UI
-    print("Starting WebSocket server on ws://localhost:8765")
-    async with websockets.serve(handle_websocket, "localhost", 8765):
-        await asyncio.Future()  # Run forever
+    # Web UI (HTTP) and WebSocket share one port
+    web_assets = WebAssets()
+    controller.log.info("Starting WebSocket server on ws://%s:%s", host, port)
+    controller.log.info("Launch Control UI at http://%s:%s/", host, port)
+    try:
+        async with websockets.serve(handle_websocket, host, port, process_request=web_assets.process_request):
+            await asyncio.Future()  # Run forever
+    finally:
+        receiver.cancel()
+        countdown.cancel()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="StarbaseSim WebSocket Proxy Server")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Websocket worker processes sharing a telemetry ring (default 1)")
+    parser.add_argument("--host", default="localhost",
+                        help="Interface to serve on, e.g. 0.0.0.0 for remote consoles (default localhost)")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="HTTP and WebSocket port (default 8765)")
+    parser.add_argument("--journal", default=EventLog.DEFAULT_JOURNAL,
+                        help=f"Event journal file, '' to disable (default {EventLog.DEFAULT_JOURNAL})")
+    args = parser.parse_args()
+    EventLog.start(args.journal or None)
+
     print("=" * 60)
     print("StarbaseSim WebSocket Proxy Server")
     print("=" * 60)
     print("1. Make sure StarbaseSim game is running")
-    print("2. Open launch_control.html in your browser")
+    print(f"2. Open http://{args.host}:{args.port}/ in your browser")
     print("=" * 60)
-    asyncio.run(main())
+    if args.workers > 1:
+        import FanOut
+        asyncio.run(FanOut.main(workers=args.workers, host=args.host, port=args.port))
+    else:
+        asyncio.run(main(args.host, args.port))
@@ -0,0 +1,361 @@
+"""
+StarbaseSim Launch Control - Soak Test
+Runs the stand-in game, server and flight software together for a long
+session while consoles come and go and the game link drops, sampling memory
+(RSS and tracemalloc) and live tasks to catch leaks. Exits non-zero when
+anything grows faster than its threshold.
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tracemalloc
+
+import websockets
+
+import Server
+import EventLog
+import FlightSoftware
+from Clock import Clock, SimulatedClock
+from StandInGame import StandInGame
+from TelemetryHistory import TelemetryHistory
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # Optional, /proc (or peak RSS) is used instead
+
+TOP_ALLOCATORS = 10
+SETTLE_TIME = 0.5  # Real seconds for the server to notice consoles leaving before a sample
+# Same bucket widths as the real history, but full within a minute: bounded growth is over by the end of warmup
+SOAK_RESOLUTIONS = ((1, 30), (10, 3), (60, 1))
+IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>', '<unknown>')
+
+def rss_bytes():
+    """Resident set size of this process, None if it can't be read here"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS, but it still only climbs on a leak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def slope(points):
+    """Least-squares growth per minute of [(seconds, value)]"""
+    points = [(t, value) for t, value in points if value is not None]
+    if len(points) < 2:
+        return 0.0
+    mean_t = sum(t for t, _ in points) / len(points)
+    mean_value = sum(value for _, value in points) / len(points)
+    variance = sum((t - mean_t) ** 2 for t, _ in points)
+    if not variance:
+        return 0.0
+    return sum((t - mean_t) * (value - mean_value) for t, value in points) / variance * 60
+
+def top_growth(baseline, snapshot, limit=TOP_ALLOCATORS):
+    """Source lines whose allocations grew the most between two tracemalloc snapshots"""
+    return [
+        {
+            "where": str(stat.traceback[0]) if stat.traceback else '?',
+            "size_kb": round(stat.size / 1024, 1),
+            "growth_kb": round(stat.size_diff / 1024, 1),
+            "count_growth": stat.count_diff
+        }
+        for stat in snapshot.compare_to(baseline, 'lineno')[:limit]
+        if stat.size_diff > 0
+    ]
+
+class Soak:
+    """One soak run: the whole stack on one event loop, plus console churn and game-link drops"""
+
+    def __init__(self, duration=600.0, interval=10.0, warmup=60.0, clients=8, churn=2.0, drop_interval=30.0,
+                 port=8766, speed=1.0, tick=None, seed=None, frames=1, full_history=False):
+        self.duration = duration  # Real seconds
+        self.interval = interval  # Real seconds between samples
+        self.warmup = warmup  # Real seconds before the baseline sample (caches filling up, imports)
+        self.clients = clients  # Consoles connected at once
+        self.churn = churn  # Real seconds between console top-ups
+        self.drop_interval = drop_interval  # Real seconds between game-link drops (0 = never)
+        self.port = port
+        self.tick = tick  # Telemetry interval in clock seconds (None = follow SendDataTick)
+        self.frames = frames  # Traceback depth for tracemalloc
+        self.full_history = full_history  # Keep the real 24 h telemetry history (grows for its first day)
+        self.clock = Clock() if speed == 1 else SimulatedClock(speed=speed)
+        self.random = random.Random(seed)
+
+        self.game = None
+        self.flight_software = None
+        self.samples = []
+        self.baseline = None  # tracemalloc snapshot at the end of warmup
+        self.snapshot = None  # Latest tracemalloc snapshot
+        self.sessions = set()
+        self.churner = None
+        self.connections = 0
+        self.console_errors = 0
+        self.drops = 0
+        self.acks = {}  # command_ack status -> count
+
+    @property
+    def url(self):
+        return f"ws://localhost:{self.port}"
+
+    # =========================================================================
+    # LOAD
+    # =========================================================================
+
+    async def console(self, hold):
+        """One console session: subscribe, ask for history, read for a while, leave"""
+        try:
+            async with websockets.connect(self.url) as ws:
+                await ws.send(json.dumps({"type": "subscribe", "rate": self.random.choice((1, 10, 20))}))
+                await ws.send(json.dumps({"type": "get_history", "objectname": "B0",
+                                          "fields": ["location.2", "throttle"], "points": 200}))
+                await ws.send(json.dumps({"type": "clock_sync", "client_time": time.time()}))
+                deadline = time.monotonic() + hold
+                while (remaining := deadline - time.monotonic()) > 0:
+                    try:
+                        await asyncio.wait_for(ws.recv(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if self.random.random() < 0.25:
+                    ws.transport.abort()  # Vanish without a close handshake, like a closed laptop
+        except (OSError, websockets.exceptions.WebSocketException):
+            self.console_errors += 1
+
+    async def churn_consoles(self):
+        """Keep `clients` consoles connected, each staying a random while"""
+        while True:
+            while len(self.sessions) < self.clients:
+                session = asyncio.create_task(self.console(self.random.uniform(0.2, 4 * self.churn)))
+                self.sessions.add(session)
+                session.add_done_callback(self.sessions.discard)
+                self.connections += 1
+            await asyncio.sleep(self.churn)
+
+    async def quiesce(self):
+        """
+        Disconnect every console and let the server notice, so each sample sees
+        the same idle stack: anything still held for a gone console is a leak
+        """
+        if self.churner:
+            self.churner.cancel()
+        sessions = [self.churner, *self.sessions] if self.churner else list(self.sessions)
+        for session in sessions:
+            session.cancel()
+        await asyncio.gather(*sessions, return_exceptions=True)
+        await asyncio.sleep(SETTLE_TIME)
+
+    async def drop_game_link(self):
+        """Close the game's end of the link now and then, the server has to reconnect"""
+        while True:
+            await asyncio.sleep(self.drop_interval)
+            await self.game.drop_clients()
+            self.drops += 1
+
+    async def fly(self):
+        """Flight software keeps commanding both vehicles and waiting for each confirmation"""
+        throttle = 100
+        while True:
+            throttle = 60 if throttle == 100 else 100
+            for command_id in (await self.flight_software.set_throttle('booster', throttle),
+                               await self.flight_software.set_propellant('ship', self.random.uniform(0, 1500))):
+                if command_id:
+                    ack = await self.flight_software.wait_for_command(command_id, 15)
+                    status = ack['status'] if ack else 'none'
+                    self.acks[status] = self.acks.get(status, 0) + 1
+            await asyncio.sleep(0.5)
+
+    # =========================================================================
+    # SAMPLING
+    # =========================================================================
+
+    def sample(self, elapsed):
+        gc.collect()  # Only count what is really still referenced
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+        )
+        if self.baseline is None and elapsed >= self.warmup:
+            self.baseline = snapshot
+        self.snapshot = snapshot
+
+        controller = Server.controller
+        sample = {
+            "elapsed": round(elapsed, 1),
+            "rss": rss_bytes(),
+            "heap": tracemalloc.get_traced_memory()[0],
+            "tasks": len(asyncio.all_tasks()),
+            "consoles": len(controller.websocket_clients) - (1 if self.flight_software.connected else 0),
+            "pending_commands": len(controller.commands.pending) + len(self.flight_software.pending_commands)
+        }
+        self.samples.append(sample)
+
+        rss = f"{sample['rss'] / 2**20:7.1f} MB" if sample['rss'] is not None else "      n/a"
+        print(f"{elapsed:7.0f}s  RSS {rss}  heap {sample['heap'] / 2**20:6.1f} MB  "
+              f"tasks {sample['tasks']:3d}  consoles {sample['consoles']:2d}  "
+              f"pending {sample['pending_commands']:2d}  connections {self.connections}  drops {self.drops}")
+        return sample
+
+    def slopes(self):
+        """Growth per minute after warmup"""
+        steady = [sample for sample in self.samples if sample['elapsed'] >= self.warmup]
+        return {
+            key: slope([(sample['elapsed'], sample[key]) for sample in steady])
+            for key in ("rss", "heap", "tasks", "consoles", "pending_commands")
+        }
+
+    # =========================================================================
+    # RUN
+    # =========================================================================
+
+    async def run(self):
+        """Run the soak, returns the report"""
+        tracemalloc.start(self.frames)
+        self.game = StandInGame(clock=self.clock, tick=self.tick)
+        await self.game.start()
+
+        Server.controller = Server.GameController(clock=self.clock)
+        if not self.full_history:
+            Server.controller.history = TelemetryHistory(SOAK_RESOLUTIONS)
+        server_task = asyncio.create_task(Server.main(port=self.port))
+        await asyncio.sleep(0.5)  # Let the websocket server bind
+
+        self.flight_software = FlightSoftware.FlightSoftware(clock=self.clock, server_url=self.url)
+        if not await self.flight_software.connect():
+            server_task.cancel()
+            await self.game.stop()
+            raise RuntimeError("Flight software could not connect to the server")
+        receiver = asyncio.create_task(self.flight_software.receive_telemetry())
+        self.flight_software.start_predictor()
+
+        load = [asyncio.create_task(self.fly())]
+        if self.drop_interval:
+            load.append(asyncio.create_task(self.drop_game_link()))
+
+        start = time.monotonic()
+        try:
+            while time.monotonic() - start < self.duration:
+                await self.quiesce()
+                self.sample(time.monotonic() - start)
+                self.churner = asyncio.create_task(self.churn_consoles())
+                await asyncio.sleep(max(0.0, min(self.interval, self.duration - (time.monotonic() - start))))
+            await self.quiesce()
+            self.sample(time.monotonic() - start)
+        finally:
+            await self.quiesce()
+            for task in load:
+                task.cancel()
+            await asyncio.gather(*load, return_exceptions=True)
+            await self.flight_software.shutdown()
+            receiver.cancel()
+            server_task.cancel()
+            await asyncio.gather(receiver, server_task, return_exceptions=True)
+            await self.game.stop()
+            tracemalloc.stop()
+
+        return {
+            "samples": self.samples,
+            "slopes_per_minute": self.slopes(),
+            "top_growth": top_growth(self.baseline or self.snapshot, self.snapshot),
+            "connections": self.connections,
+            "console_errors": self.console_errors,
+            "game_drops": self.drops,
+            "command_acks": self.acks,
+            "command_latency": self.flight_software.get_command_latency()
+        }
+
+def check(report, max_rss_growth, max_heap_growth, max_task_growth):
+    """Print the verdict, returns a list of failures"""
+    slopes = report['slopes_per_minute']
+    limits = (
+        ("RSS", slopes['rss'] / 1024, max_rss_growth, "KB/min"),
+        ("Python heap", slopes['heap'] / 1024, max_heap_growth, "KB/min"),
+        ("Live tasks", slopes['tasks'], max_task_growth, "tasks/min")
+    )
+    failures = []
+    stale = report['samples'][-1]['consoles'] if report['samples'] else 0
+    print("=" * 60)
+    for name, growth, limit, unit in limits:
+        leaking = growth > limit
+        print(f"{name:12s} {growth:+10.2f} {unit:9s} (limit {limit}) {'LEAK' if leaking else 'ok'}")
+        if leaking:
+            failures.append(name)
+    if stale:
+        print(f"{stale} console(s) still registered after all disconnected LEAK")
+        failures.append("Consoles")
+    print(f"Connections: {report['connections']} ({report['console_errors']} errors), "
+          f"game drops: {report['game_drops']}, command acks: {report['command_acks']}")
+    print("Top allocation growth since warmup:")
+    for entry in report['top_growth']:
+        print(f"  {entry['growth_kb']:+9.1f} KB {entry['count_growth']:+7d} blocks  {entry['where']}")
+    print("SOAK " + ("FAILED: " + ", ".join(failures) if failures else "PASSED"))
+    print("=" * 60)
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="StarbaseSim soak and memory test (stand-in game)")
+    parser.add_argument("--duration", type=float, default=600.0,
+                        help="Real seconds to run (default 600)")
+    parser.add_argument("--interval", type=float, default=10.0,
+                        help="Real seconds between samples (default 10)")
+    parser.add_argument("--warmup", type=float, default=60.0,
+                        help="Real seconds before growth is measured (default 60)")
+    parser.add_argument("--clients", type=int, default=8,
+                        help="Consoles connected at once (default 8)")
+    parser.add_argument("--churn", type=float, default=2.0,
+                        help="Real seconds between console reconnects (default 2)")
+    parser.add_argument("--drop-interval", type=float, default=30.0,
+                        help="Real seconds between game-link drops, 0 to never drop (default 30)")
+    parser.add_argument("--port", type=int, default=8766,
+                        help="Server port, apart from a running Launch Control (default 8766)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Simulated seconds per real second (default 1, real time)")
+    parser.add_argument("--tick", type=float, default=None,
+                        help="Force the telemetry interval in simulated seconds (default: follow the server)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Random seed for the console churn")
+    parser.add_argument("--full-history", action="store_true",
+                        help="Keep the full 24 h telemetry history, which legitimately grows for a day")
+    parser.add_argument("--frames", type=int, default=1,
+                        help="tracemalloc traceback depth (default 1)")
+    parser.add_argument("--max-rss-growth", type=float, default=1024.0,
+                        help="Fail above this RSS growth in KB/min (default 1024)")
+    parser.add_argument("--max-heap-growth", type=float, default=256.0,
+                        help="Fail above this Python heap growth in KB/min (default 256)")
+    parser.add_argument("--max-task-growth", type=float, default=1.0,
+                        help="Fail above this growth in live tasks per minute (default 1)")
+    parser.add_argument("--report", default=None,
+                        help="Write samples, slopes and top allocators to this JSON file")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Show every connect and disconnect")
+    args = parser.parse_args()
+
+    EventLog.start(None)
+    if not args.verbose:
+        logging.getLogger(EventLog.LOGGER_NAME).setLevel(logging.WARNING)
+
+    print("=" * 60)
+    print(f"StarbaseSim Soak Test ({args.duration:.0f}s, {args.clients} consoles)")
+    print("=" * 60)
+    soak = Soak(duration=args.duration, interval=args.interval, warmup=args.warmup, clients=args.clients,
+                churn=args.churn, drop_interval=args.drop_interval, port=args.port, speed=args.speed,
+                tick=args.tick, seed=args.seed, frames=args.frames, full_history=args.full_history)
+    report = asyncio.run(soak.run())
+    failures = check(report, args.max_rss_growth, args.max_heap_growth, args.max_task_growth)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,266 @@
+"""
+StarbaseSim Launch Control - Stand-in Game
+A minimal replacement for the StarbaseSim game server that speaks the same
+TCP protocol, so scripts and sequences can be rehearsed without the game.
+Run directly to rehearse the propellant load faster than real time.
+"""
+
+import asyncio
+import json
+import time
+import argparse
+
+import Server
+import EventLog
+import FlightSoftware
+from Clock import Clock, SimulatedClock
+from GameCommand import GameCommand
+
+GRAVITY = 9.81  # m/s^2
+FUEL_FRACTION = 739.160 / (739.160 + 2660.840)  # Methane share of total propellant mass
+RAPTOR_THRUST = 2.3e6  # N per engine at full throttle
+RAPTOR_MASS_FLOW = 650.0  # kg/s per engine at full throttle
+
+class StandInVehicle:
+    """Very simple vertical-flight model of one vehicle"""
+
+    def __init__(self, objectname, engine_count, dry_mass):
+        self.objectname = objectname
+        self.engine_count = engine_count
+        self.dry_mass = dry_mass  # kg
+        self.propellant_mass = 0.0  # kg
+        self.engine_bitmask = 0
+        self.throttle = 100
+        self.location = [0.0, 0.0, 0.0]
+        self.velocity = [0.0, 0.0, 0.0]
+
+    def running_engines(self):
+        return bin(self.engine_bitmask).count('1')
+
+    def step(self, dt):
+        """Advance the vehicle by dt seconds"""
+        engines = self.running_engines() if self.propellant_mass > 0 else 0
+        throttle = self.throttle / 100
+        thrust = engines * RAPTOR_THRUST * throttle
+        self.propellant_mass = max(0.0, self.propellant_mass - engines * RAPTOR_MASS_FLOW * throttle * dt)
+
+        mass = self.dry_mass + self.propellant_mass
+        self.velocity[2] += (thrust / mass - GRAVITY) * dt
+        for axis in range(3):
+            self.location[axis] += self.velocity[axis] * dt
+
+        # Sitting on the pad (or landed)
+        if self.location[2] <= 0:
+            self.location[2] = 0.0
+            self.velocity = [0.0, 0.0, 0.0]
+
+    def to_telemetry(self):
+        fuel_mass = self.propellant_mass * FUEL_FRACTION
+        return {
+            "objectname": self.objectname,
+            "location": list(self.location),
+            "velocity": list(self.velocity),
+            "fuelMass": fuel_mass,
+            "oxidizerMass": self.propellant_mass - fuel_mass,
+            "fuelGasMass": 0.0,
+            "oxidizerGasMass": 0.0,
+            "turbopumpTemperature": 90.0 + 200.0 * (self.running_engines() > 0),
+            "enginesThatAreRunningBitmask": self.engine_bitmask,
+            "throttle": self.throttle
+        }
+
+class StandInGame:
+    """TCP server that mimics StarbaseSim for a booster B0 and a ship S0"""
+
+    def __init__(self, clock=None, host="localhost", port=12345, tick=None):
+        self.clock = clock or Clock()
+        self.host = host
+        self.port = port
+        self.tick_override = tick  # Force a telemetry interval regardless of SendDataTick
+        self.vehicles = {
+            'booster': StandInVehicle('B0', 33, 275000.0),
+            'ship': StandInVehicle('S0', 6, 100000.0)
+        }
+        self.server = None
+        self.clients = {}  # writer -> handler task
+        self.last_step = None
+        self.commands_received = 0
+
+    async def start(self):
+        """Start listening for the proxy server"""
+        self.last_step = self.clock.monotonic()
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        print(f"Stand-in game listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.drop_clients()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def drop_clients(self):
+        """Close every game link, like the game dropping its connections"""
+        handlers = list(self.clients.values())
+        for writer in list(self.clients):
+            writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def find_vehicle(self, target):
+        """Accept 'booster'/'ship' as well as object names like 'B0' or 'S0'"""
+        target = str(target or '').lower()
+        if target.startswith('b'):
+            return self.vehicles['booster']
+        if target.startswith('s'):
+            return self.vehicles['ship']
+        return None
+
+    def advance(self):
+        """Step the physics up to the current clock time"""
+        now = self.clock.monotonic()
+        dt = now - self.last_step
+        self.last_step = now
+        if dt > 0:
+            for vehicle in self.vehicles.values():
+                vehicle.step(dt)
+
+    def apply_command(self, command_data):
+        """Apply a game command, returns the new data tick if it changed"""
+        self.commands_received += 1
+        self.advance()
+        command = command_data.get("command")
+        vehicle = self.find_vehicle(command_data.get("target"))
+
+        if command == GameCommand.SendDataTick:
+            return float(command_data.get("value", 0.1))
+
+        if vehicle is None:
+            return None
+
+        if command == GameCommand.Propellant:
+            vehicle.propellant_mass = max(0.0, float(command_data.get("value", 0)))
+        elif command == GameCommand.Engines:
+            vehicle.engine_bitmask = (1 << vehicle.engine_count) - 1 if command_data.get("state") else 0
+        elif command == GameCommand.Raptor:
+            bit = 1 << (int(command_data.get("value", 1)) - 1)
+            if command_data.get("state"):
+                vehicle.engine_bitmask |= bit
+            else:
+                vehicle.engine_bitmask &= ~bit
+        elif command == GameCommand.Throttle:
+            vehicle.throttle = max(0, min(100, command_data.get("value", 100)))
+        return None
+
+    async def handle_client(self, reader, writer):
+        """Serve one proxy connection: read commands, stream telemetry"""
+        print("Stand-in game: client connected")
+        self.clients[writer] = asyncio.current_task()
+        state = {"tick": 0.1}
+        sender = asyncio.create_task(self._send_telemetry(writer, state))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    new_tick = self.apply_command(json.loads(line))
+                except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+                    continue
+                if new_tick:
+                    state["tick"] = new_tick
+        except ConnectionError:
+            pass
+        finally:
+            sender.cancel()
+            writer.close()
+            self.clients.pop(writer, None)
+            print("Stand-in game: client disconnected")
+
+    async def _send_telemetry(self, writer, state):
+        frames = 0
+        try:
+            while True:
+                await self.clock.sleep(self.tick_override or state["tick"])
+                self.advance()
+                lines = [json.dumps(vehicle.to_telemetry()) for vehicle in self.vehicles.values()]
+                frames += 1
+                if frames % 100 == 0:
+                    lines.append("Client still there?")
+                writer.write(("\n".join(lines) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+# =========================================================================
+# REHEARSAL
+# =========================================================================
+
+async def rehearse(speed=600.0, tick=5.0):
+    """
+    Run stand-in game, server and flight software on a simulated clock and
+    rehearse the propellant load sequence. Returns True if both vehicles filled.
+    speed: simulated seconds per real second (None = event-skip)
+    tick: telemetry interval in simulated seconds
+    """
+    clock = SimulatedClock(speed=speed)
+    game = StandInGame(clock=clock, tick=tick)
+    await game.start()
+
+    # Fresh controller so the tick rate manager and countdown run on the simulated clock too
+    Server.controller = Server.GameController(clock=clock)
+    server_task = asyncio.create_task(Server.main())
+    await asyncio.sleep(0.5)  # Real time: let the websocket server bind
+
+    flight_software = FlightSoftware.FlightSoftware(clock=clock)
+    if not await flight_software.connect():
+        server_task.cancel()
+        await game.stop()
+        return False
+    receiver = asyncio.create_task(flight_software.receive_telemetry())
+
+    real_start = time.monotonic()
+    sim_start = clock.monotonic()
+
+    await flight_software.ascent_script_1()
+    filled = await flight_software.wait_for_condition(
+        lambda: (flight_software.get_total_propellant('ship') >= flight_software.ship_target_propellant and
+                 flight_software.get_total_propellant('booster') >= flight_software.booster_target_propellant),
+        timeout=2 * 3600
+    )
+
+    sim_elapsed = clock.monotonic() - sim_start
+    real_elapsed = time.monotonic() - real_start
+
+    print("=" * 60)
+    print("REHEARSAL " + ("PASSED" if filled else "FAILED"))
+    print(f"Ship: {flight_software.get_total_propellant('ship'):.1f} t, "
+          f"Booster: {flight_software.get_total_propellant('booster'):.1f} t")
+    print(f"Simulated {sim_elapsed / 60:.1f} min in {real_elapsed:.1f} s real time "
+          f"({game.commands_received} game commands)")
+    print("=" * 60)
+
+    flight_software.stop_propellant_filling()
+    receiver.cancel()
+    await flight_software.ws.close()
+    server_task.cancel()
+    await game.stop()
+    return filled
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="StarbaseSim stand-in game and rehearsal")
+    parser.add_argument("--speed", type=float, default=600.0,
+                        help="Simulated seconds per real second (default 600)")
+    parser.add_argument("--skip", action="store_true",
+                        help="Event-skip mode: jump straight to the next scheduled step")
+    parser.add_argument("--tick", type=float, default=5.0,
+                        help="Telemetry interval in simulated seconds (default 5)")
+    parser.add_argument("--journal", default='',
+                        help="Event journal for the rehearsal (default none, simulated records stay out of the real journal)")
+    args = parser.parse_args()
+    EventLog.start(args.journal or None)
+
+    print("=" * 60)
+    print("StarbaseSim Rehearsal (stand-in game)")
+    print("=" * 60)
+    ok = asyncio.run(rehearse(speed=None if args.skip else args.speed, tick=args.tick))
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,188 @@
+"""
+StarbaseSim Launch Control - Telemetry History
+In-memory multi-resolution rollups of numeric telemetry per vehicle, with
+a downsampled history query for charts
+"""
+
+from collections import deque
+
+# (bucket seconds, buckets kept) - finest first. Memory is bounded by the deques.
+RESOLUTIONS = (
+    (1, 3600),  # 1 hour of 1 s buckets
+    (10, 1440),  # 4 hours of 10 s buckets
+    (60, 1440)  # 24 hours of 1 min buckets
+)
+
+# Respawned vehicles come back under new object names, keep only the latest ones
+MAX_VEHICLES = 8
+
+# Numeric fields that make no sense as min/max/mean
+SKIP_FIELDS = {'enginesThatAreRunningBitmask'}
+
+def numeric_fields(telemetry):
+    """Flatten a telemetry frame to {field: number}, vectors become 'location.2' etc."""
+    fields = {}
+    for key, value in telemetry.items():
+        if key in SKIP_FIELDS or isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            fields[key] = value
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                if isinstance(item, (int, float)) and not isinstance(item, bool):
+                    fields[f"{key}.{index}"] = item
+    return fields
+
+def lttb(points, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+    points: list of (t, value) sorted by t
+    threshold: number of points wanted
+    Keeps the visual shape (peaks and dips) of the series.
+    """
+    count = len(points)
+    if threshold >= count:
+        return list(points)
+    if threshold <= 0:
+        return []
+    if threshold < 3:
+        return [points[0], points[-1]][-threshold:]
+
+    sampled = [points[0]]
+    every = (count - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket, the third triangle corner
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, count)
+        next_points = points[next_start:next_end]
+        avg_t = sum(p[0] for p in next_points) / len(next_points)
+        avg_v = sum(p[1] for p in next_points) / len(next_points)
+
+        # Pick the point in this bucket making the largest triangle
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        a_t, a_v = points[a]
+        max_area = -1
+        chosen = start
+        for j in range(start, end):
+            area = abs((a_t - avg_t) * (points[j][1] - a_v) - (a_t - points[j][0]) * (avg_v - a_v))
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        sampled.append(points[chosen])
+        a = chosen
+
+    sampled.append(points[-1])
+    return sampled
+
+class Rollup:
+    """Fixed-width time buckets holding min/max/sum/count/last per field"""
+
+    def __init__(self, width, capacity):
+        self.width = width
+        self.buckets = deque(maxlen=capacity)  # (start, {field: [min, max, sum, count, last]})
+
+    def add(self, timestamp, fields):
+        start = timestamp - (timestamp % self.width)
+        if not self.buckets or self.buckets[-1][0] != start:
+            self.buckets.append((start, {}))
+        stats = self.buckets[-1][1]
+
+        for field, value in fields.items():
+            entry = stats.get(field)
+            if entry is None:
+                stats[field] = [value, value, value, 1, value]
+            else:
+                if value < entry[0]:
+                    entry[0] = value
+                if value > entry[1]:
+                    entry[1] = value
+                entry[2] += value
+                entry[3] += 1
+                entry[4] = value
+
+    def oldest(self):
+        return self.buckets[0][0] if self.buckets else None
+
+    def series(self, field, start, end):
+        """[(bucket start, mean, min, max, last)] between start and end"""
+        result = []
+        for bucket_start, stats in self.buckets:
+            if bucket_start + self.width <= start or bucket_start > end:
+                continue
+            entry = stats.get(field)
+            if entry:
+                result.append((bucket_start, entry[2] / entry[3], entry[0], entry[1], entry[4]))
+        return result
+
+class TelemetryHistory:
+    """Rollups for every vehicle, fed from the game telemetry stream"""
+
+    def __init__(self, resolutions=RESOLUTIONS, max_vehicles=MAX_VEHICLES):
+        self.resolutions = resolutions
+        self.max_vehicles = max_vehicles
+        self.retention = max(width * capacity for width, capacity in resolutions)  # Coarsest window, s
+        self.vehicles = {}  # objectname -> [Rollup per resolution]
+        self.last_seen = {}  # objectname -> timestamp of its last frame
+
+    def add(self, telemetry, timestamp):
+        objectname = telemetry.get('objectname')
+        if not objectname:
+            return
+        self.expire(timestamp)
+        rollups = self.vehicles.get(objectname)
+        if rollups is None:
+            if len(self.vehicles) >= self.max_vehicles:
+                self.forget(min(self.last_seen, key=self.last_seen.get))
+            rollups = [Rollup(width, capacity) for width, capacity in self.resolutions]
+            self.vehicles[objectname] = rollups
+        self.last_seen[objectname] = timestamp
+
+        fields = numeric_fields(telemetry)
+        for rollup in rollups:
+            rollup.add(timestamp, fields)
+
+    def expire(self, timestamp):
+        """Forget vehicles that have not reported for longer than the coarsest window"""
+        for objectname, seen in list(self.last_seen.items()):
+            if timestamp - seen > self.retention:
+                self.forget(objectname)
+
+    def forget(self, objectname):
+        self.vehicles.pop(objectname, None)
+        self.last_seen.pop(objectname, None)
+
+    def pick_rollup(self, objectname, start):
+        """Finest rollup that still reaches back to start"""
+        rollups = self.vehicles.get(objectname)
+        if not rollups:
+            return None
+        for rollup in rollups:
+            oldest = rollup.oldest()
+            if oldest is not None and oldest <= start:
+                return rollup
+        return rollups[-1]
+
+    def query(self, objectname, fields, start, end, points=500):
+        """
+        Downsampled history for charts
+        Returns {field: [[t, mean, min, max], ...]} with at most `points` entries per field
+        """
+        rollup = self.pick_rollup(objectname, start)
+        result = {
+            "objectname": objectname,
+            "resolution": rollup.width if rollup else None,
+            "fields": {}
+        }
+        if rollup is None:
+            return result
+
+        for field in fields:
+            series = rollup.series(field, start, end)
+            by_time = {row[0]: row for row in series}
+            chosen = lttb([(row[0], row[1]) for row in series], points)
+            result["fields"][field] = [[t, mean, by_time[t][2], by_time[t][3]] for t, mean in chosen]
+        return result
@@ -0,0 +1,77 @@
+"""
+StarbaseSim Launch Control - Trajectory Predictor
+Vectorized ballistic integrator with simple drag. Kept in its own module with
+no other imports so it loads quickly in a worker process.
+"""
+
+import numpy as np
+
+GRAVITY = 9.81  # m/s^2
+SEA_LEVEL_DENSITY = 1.225  # kg/m^3
+SCALE_HEIGHT = 8500.0  # m, exponential atmosphere
+
+# Ballistic coefficients (mass / (Cd * area)) in kg/m^2 - rough, tune as needed
+BOOSTER_BALLISTIC_COEFFICIENT = 2000.0
+SHIP_BALLISTIC_COEFFICIENT = 600.0
+
+def predict_batch(locations, velocities, ballistic_coefficients, dt=1.0, max_time=1200.0):
+    """
+    Predict unpowered trajectories for several vehicles at once
+    locations, velocities: lists of [x, y, z] in m and m/s (z up, ground at z=0)
+    ballistic_coefficients: one value per vehicle in kg/m^2
+    Returns one dict per vehicle with apogee, time_to_apogee, impact_point
+    and time_to_ground (None if it doesn't come down within max_time).
+    """
+    pos = np.array(locations, dtype=float).reshape(-1, 3)
+    vel = np.array(velocities, dtype=float).reshape(-1, 3)
+    beta = np.broadcast_to(np.asarray(ballistic_coefficients, dtype=float), (len(pos),)).copy()
+
+    apogee = pos[:, 2].copy()
+    time_to_apogee = np.zeros(len(pos))
+    impact = np.full((len(pos), 2), np.nan)
+    time_to_ground = np.full(len(pos), np.nan)
+
+    # Already on the ground
+    active = pos[:, 2] > 0
+    impact[~active] = pos[~active, :2]
+    time_to_ground[~active] = 0.0
+
+    t = 0.0
+    for _ in range(int(max_time / dt)):
+        if not active.any():
+            break
+
+        speed = np.linalg.norm(vel, axis=1)
+        density = SEA_LEVEL_DENSITY * np.exp(-np.maximum(pos[:, 2], 0) / SCALE_HEIGHT)
+        accel = -0.5 * (density * speed / beta)[:, None] * vel
+        accel[:, 2] -= GRAVITY
+
+        new_vel = vel + accel * dt
+        new_pos = pos + (vel + new_vel) * 0.5 * dt
+        new_vel[~active] = vel[~active]
+        new_pos[~active] = pos[~active]
+        t += dt
+
+        rising = active & (new_pos[:, 2] > apogee)
+        apogee[rising] = new_pos[rising, 2]
+        time_to_apogee[rising] = t
+
+        landed = active & (new_pos[:, 2] <= 0)
+        if landed.any():
+            # Interpolate the ground crossing inside this step
+            fraction = pos[landed, 2] / (pos[landed, 2] - new_pos[landed, 2])
+            impact[landed] = pos[landed, :2] + fraction[:, None] * (new_pos[landed, :2] - pos[landed, :2])
+            time_to_ground[landed] = t - dt + fraction * dt
+            active &= ~landed
+
+        pos, vel = new_pos, new_vel
+
+    return [
+        {
+            "apogee": float(apogee[i]),
+            "time_to_apogee": float(time_to_apogee[i]),
+            "impact_point": None if np.isnan(time_to_ground[i]) else [float(impact[i, 0]), float(impact[i, 1])],
+            "time_to_ground": None if np.isnan(time_to_ground[i]) else float(time_to_ground[i])
+        }
+        for i in range(len(pos))
+    ]
@@ -0,0 +1,136 @@
+"""
+StarbaseSim Launch Control - Web Assets
+Serves LaunchControl.html and static files over HTTP on the websocket port.
+Files are read and compressed once at startup; responses carry an ETag so a
+repeat load is a 304.
+"""
+
+import os
+import sys
+import gzip
+import hashlib
+import mimetypes
+from http import HTTPStatus
+
+from websockets.datastructures import Headers
+from websockets.http11 import Response
+
+import EventLog
+
+try:
+    import brotli
+except ImportError:
+    brotli = None  # Optional, gzip is always available
+
+STATIC_EXTENSIONS = {'.html', '.ico', '.css', '.js', '.png', '.svg', '.json'}
+INDEX_FILE = 'LaunchControl.html'
+
+def get_base_path():
+    """Folder holding LaunchControl.html"""
+    # When running as .exe, files are in _MEIPASS temp directory
+    if getattr(sys, 'frozen', False):
+        return sys._MEIPASS
+    return os.path.dirname(os.path.abspath(__file__))
+
+def accepted_encodings(header):
+    """Content codings from an Accept-Encoding header, ignoring q=0"""
+    encodings = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+class StaticAsset:
+    """One file, with its precompressed variants"""
+
+    def __init__(self, path, content):
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/'):
+            self.content_type += '; charset=utf-8'
+        self.digest = hashlib.sha1(content).hexdigest()
+        self.bodies = {'identity': content}
+
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            self.bodies['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content):
+                self.bodies['br'] = compressed
+
+    def etag(self, encoding):
+        """Each encoded variant is a different representation with its own ETag"""
+        if encoding == 'identity':
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+    def pick_encoding(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.bodies and encoding in accepted:
+                return encoding
+        return 'identity'
+
+class WebAssets:
+    """Static files from the app folder, loaded once"""
+
+    def __init__(self, base_path=None):
+        self.base_path = base_path or get_base_path()
+        self.assets = {}
+        self.log = EventLog.EventLog('web')
+        self.load()
+
+    def load(self):
+        for name in sorted(os.listdir(self.base_path)):
+            path = os.path.join(self.base_path, name)
+            if os.path.splitext(name)[1].lower() not in STATIC_EXTENSIONS or not os.path.isfile(path):
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    self.assets['/' + name] = StaticAsset(path, f.read())
+            except OSError as e:
+                self.log.error("Error loading %s: %s", name, e)
+
+        self.log.info("Serving %d web assets from %s (%s)", len(self.assets), self.base_path,
+                      'br+gzip' if brotli else 'gzip')
+        if '/' + INDEX_FILE in self.assets:
+            self.assets['/'] = self.assets['/' + INDEX_FILE]
+
+    def response(self, status, headers, body=b''):
+        # websockets serves one request per connection, tell the browser not to hold it open
+        headers = headers + [('Connection', 'close')]
+        if status != HTTPStatus.NOT_MODIFIED:
+            headers.append(('Content-Length', str(len(body))))
+        return Response(status.value, status.phrase, Headers(headers), body)
+
+    def handle(self, request):
+        """HTTP response for a plain GET request"""
+        path = request.path.split('?', 1)[0]
+        asset = self.assets.get(path)
+        if asset is None:
+            return self.response(HTTPStatus.NOT_FOUND, [('Content-Type', 'text/plain')], b'Not Found')
+
+        encoding = asset.pick_encoding(request.headers.get('Accept-Encoding'))
+        etag = asset.etag(encoding)
+        headers = [
+            ('ETag', etag),
+            ('Cache-Control', 'no-cache'),  # Always revalidate, unchanged files come back as 304
+            ('Vary', 'Accept-Encoding')
+        ]
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            return self.response(HTTPStatus.NOT_MODIFIED, headers)
+
+        headers.append(('Content-Type', asset.content_type))
+        if encoding != 'identity':
+            headers.append(('Content-Encoding', encoding))
+        return self.response(HTTPStatus.OK, headers, asset.bodies[encoding])
+
+    def process_request(self, connection, request):
+        """websockets hook: answer plain HTTP requests, let upgrades through"""
+        if request.headers.get('Upgrade', '').lower() == 'websocket':
+            return None
+        return self.handle(request)
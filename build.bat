@@ -25,6 +25,13 @@ if errorlevel 1 (
     pip install websockets
 )
 
+REM Check if numpy is installed
+python -c "import numpy" 2>nul
+if errorlevel 1 (
+    echo numpy not found. Installing...
+    pip install numpy
+)
+
 echo.
 echo Building executable...
 echo.
@@ -34,9 +41,11 @@ pyinstaller --noconfirm --onefile --windowed ^
     --name "LaunchControl" ^
     --icon="Rocket.ico" ^
     --add-data "LaunchControl.html;." ^
+    --add-data "Rocket.ico;." ^
     --hidden-import "websockets" ^
     --hidden-import "webview" ^
     --hidden-import "asyncio" ^
+    --hidden-import "numpy" ^
     main.py
 
 echo.